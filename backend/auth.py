@@ -1,23 +1,27 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from database import get_db, User
+from passwords import pwd_context, verify_and_update_async
+from auth_cache import TokenCache, PrincipalCache, invalidate_on_user_changes, user_columns
+from refresh_tokens import REFRESH_TOKEN_TYPE, refresh_claims, is_revoked
 
 # Security configuration
 SECRET_KEY = "your-secret-key-here-change-in-production"  # Change this in production!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 Bearer token
 security = HTTPBearer()
 
+# Verified claims keyed by bearer token (until the token expires), and resolved
+# users (column values) keyed by token subject, dropped whenever a user row changes
+token_cache = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+principal_cache = invalidate_on_user_changes(PrincipalCache())
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -37,18 +41,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
-    """Verify and decode a JWT token."""
+def create_refresh_token(username: str, user_id: Optional[int] = None):
+    """Create a long-lived JWT refresh token (see refresh_tokens)."""
+    return jwt.encode(refresh_claims(username, user_id), SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_token(token: str, token_type: str = "access") -> dict:
+    """Verify a JWT token of ``token_type`` and return its claims."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.claims(token)
         username: str = payload.get("sub")
-        if username is None:
+        # Tokens without a type claim predate refresh tokens and are access tokens
+        if username is None or payload.get("type", "access") != token_type:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return username
+        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,17 +65,42 @@ def verify_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def verify_token(token: str):
+    """Verify and decode a JWT token."""
+    return decode_token(token)["sub"]
+
+def decode_refresh_token(db: Session, token: str) -> dict:
+    """Verify a refresh token that has not been revoked and return its claims."""
+    payload = decode_token(token, token_type=REFRESH_TOKEN_TYPE)
+    if payload.get("jti") is None or is_revoked(db, payload["jti"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     """Get the current authenticated user."""
     token = credentials.credentials
-    username = verify_token(token)
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    payload = decode_token(token)
+    username, user_id = payload["sub"], payload.get("uid")
+    
+    # A recently resolved user is attached to this session without a query
+    columns = principal_cache.get(username)
+    if columns is not None and user_id in (None, columns["id"]):
+        user = User(**columns)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+    
+    user = db.get(User, user_id) if user_id is not None else db.query(User).filter(User.username == username).first()
+    if user is None or user.username != username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    principal_cache.put(username, user_columns(user))
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -85,10 +119,33 @@ def get_admin_user(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 def authenticate_user(db: Session, username: str, password: str):
-    """Authenticate a user with username and password."""
+    """Authenticate a user with username and password; re-hashes it if BCRYPT_ROUNDS changed.
+
+    bcrypt runs inline here; async handlers use ``authenticate_user_async``.
+    """
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        return False
+    valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    return user
+
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """``authenticate_user`` with only the bcrypt verification on the hashing pool.
+
+    Raises ``executors.PoolSaturated`` when the hashing queue is full.
+    """
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
     return user
\ No newline at end of file
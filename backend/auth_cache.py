@@ -0,0 +1,190 @@
+"""In-process caches for the authentication path.
+
+Clients send the same bearer token on every request until it expires, and
+verifying it (HMAC over the token, then parsing the claims) is the same work
+each time. ``TokenCache`` maps a token to its verified claims, each entry
+expiring at the token's own ``exp``, so a token is verified once per process
+and an expired one is always re-checked (and rejected) by the JWT library.
+Only tokens that verified are cached; a forged or tampered token never
+matches a cached one because the key is the full token string.
+
+Every authenticated request used to load its user from the database just to
+learn the id and role. ``PrincipalCache`` keeps the resolved user (the
+principal) keyed by the token subject for a short TTL, bounded in size with
+LRU eviction, so a client making a run of cart and order calls costs one
+lookup per TTL instead of one per request.
+
+A cached principal is dropped as soon as the user row changes: any ORM update
+or delete of a ``User`` in this process (profile edit, deactivation, role
+change) invalidates its subject on flush and again after the commit, so a
+request racing the transaction cannot keep the old row. Other worker
+processes see the change when their entry expires, so the TTL bounds how long
+a demoted or deactivated user keeps access there.
+
+Settings (all optional):
+    TOKEN_CACHE_SIZE       verified tokens kept per process, 0 = off (10000)
+    PRINCIPAL_CACHE_SIZE   principals kept per process (10000)
+    PRINCIPAL_CACHE_TTL    seconds a principal is trusted without a reload (60)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from database import User
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+PRINCIPAL_CACHE_TTL = float(os.getenv('PRINCIPAL_CACHE_TTL', '60'))
+
+
+class TokenCache:
+    """Bounded LRU cache from a bearer token to its verified claims, expiring at the token's ``exp``"""
+
+    def __init__(self, decode, max_entries=None):
+        # decode(token) -> claims, raising the JWT library's error for an invalid token
+        self.decode = decode
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = TOKEN_CACHE_SIZE if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def claims(self, token):
+        """Verified claims of ``token``; decodes (and may raise) on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+
+        payload = self.decode(token)
+        expires = payload.get('exp')
+        # Tokens without a numeric exp never expire on their own; always verify those
+        if self.max_entries > 0 and isinstance(expires, (int, float)) and expires > now:
+            with self._lock:
+                self._entries[token] = (expires, payload)
+                self._entries.move_to_end(token)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of resolved principals keyed by token subject (username)"""
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries or PRINCIPAL_CACHE_SIZE
+        self.ttl_seconds = PRINCIPAL_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, subject):
+        """The cached principal for ``subject``, or None if absent or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, subject, principal):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *subjects):
+        """Drop the principals for ``subjects`` so the next request reloads them"""
+        with self._lock:
+            for subject in subjects:
+                if self._entries.pop(subject, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+
+def user_columns(user):
+    """Column values of a ``User`` row, for caching it detached from its session"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def changed_usernames(user):
+    """Current and (if it is being renamed) previous username of ``user``"""
+    history = inspect(user).attrs.username.history
+    return {name for name in (user.username, *history.deleted) if name}
+
+
+def invalidate_on_user_changes(cache):
+    """Drop ``cache`` entries whenever a ``User`` is updated or deleted through the ORM"""
+    pending_key = f'principal_cache_{id(cache)}'
+
+    def user_changed(mapper, connection, user):
+        usernames = changed_usernames(user)
+        cache.invalidate(*usernames)
+        session = object_session(user)
+        if session is not None:
+            session.info.setdefault(pending_key, set()).update(usernames)
+
+    def after_commit(session):
+        usernames = session.info.pop(pending_key, None)
+        if usernames:
+            cache.invalidate(*usernames)
+
+    def after_rollback(session):
+        session.info.pop(pending_key, None)
+
+    event.listen(User, 'after_update', user_changed)
+    event.listen(User, 'after_delete', user_changed)
+    event.listen(Session, 'after_commit', after_commit)
+    event.listen(Session, 'after_rollback', after_rollback)
+    return cache
@@ -0,0 +1,134 @@
+"""Async micro-batching for concurrent single-row predictions.
+
+Under load many ``/predict`` calls arrive within a few milliseconds of each
+other, and each one used to run its own one-row prediction. The coalescer
+parks every request's feature row on a future, waits a short window (or
+until enough rows are pending), scores all of them with one vectorized call
+and resolves each caller's future with its own result.
+
+A request that arrives while nothing is pending or being scored is
+dispatched at once and, being a single row, scored inline without a thread
+hop, so an idle or sequentially used server pays no batching delay. The
+window only opens for rows that arrive while another batch is in flight,
+which is exactly when there is something to coalesce.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+PREDICT_BATCH_WINDOW_MS = float(os.getenv('PREDICT_BATCH_WINDOW_MS', '2'))
+PREDICT_MAX_BATCH_SIZE = int(os.getenv('PREDICT_MAX_BATCH_SIZE', '64'))
+
+# Number of recent batches kept for percentile metrics
+STATS_WINDOW = 1000
+
+
+class PredictionCoalescer:
+    """Gathers pending single-row predictions and runs them as one batch"""
+
+    def __init__(self, predict_batch, max_batch_size=None, max_wait_ms=None, runner=None):
+        self.predict_batch = predict_batch
+        # Optional ``async runner(fn, *args)`` used to run batches off the event loop
+        self.runner = runner
+        self.max_batch_size = max_batch_size or PREDICT_MAX_BATCH_SIZE
+        self.max_wait = (PREDICT_BATCH_WINDOW_MS if max_wait_ms is None else max_wait_ms) / 1000
+
+        self._pending = []
+        self._flush_handle = None
+        self._running = set()
+        # Rows handed to a batch whose callers have not been answered yet
+        self._in_flight = 0
+
+        self.total_batches = 0
+        self.total_items = 0
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._queue_delays = deque(maxlen=STATS_WINDOW)
+
+    async def predict(self, row, context=None):
+        """Queue one feature row and wait for its prediction.
+
+        Rows are only batched with rows that share the same ``context`` (e.g.
+        the model bundle they were encoded with), which is passed through to
+        ``predict_batch``.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, context, future, time.perf_counter()))
+
+        # Idle: nothing to wait for, so do not hold a lone request for the window
+        idle = len(self._pending) == 1 and self._in_flight == 0
+        if idle or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand every pending row to a batch task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._in_flight += len(batch)
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch):
+        """Score a batch with one call per context and resolve each caller's future"""
+        started = time.perf_counter()
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+
+        for group in groups.values():
+            context = group[0][1]
+            feature_matrix = np.vstack([row for row, _, _, _ in group])
+            try:
+                # One row is scored in well under a millisecond; not worth a thread hop
+                if self.runner is None or len(group) == 1:
+                    predictions = self.predict_batch(feature_matrix, context)
+                else:
+                    predictions = await self.runner(self.predict_batch, feature_matrix, context)
+            except Exception as e:
+                self._in_flight -= len(group)
+                for _, _, future, _ in group:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._in_flight -= len(group)
+
+            for (_, _, future, enqueued_at), prediction in zip(group, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+                self._queue_delays.append((started - enqueued_at) * 1000)
+
+        self.total_batches += 1
+        self.total_items += len(batch)
+        self._batch_sizes.append(len(batch))
+
+    def stats(self):
+        """Batch size and queueing delay metrics"""
+        batch_sizes = np.array(self._batch_sizes) if self._batch_sizes else np.zeros(1)
+        queue_delays = np.array(self._queue_delays) if self._queue_delays else np.zeros(1)
+        return {
+            'window_ms': self.max_wait * 1000,
+            'max_batch_size': self.max_batch_size,
+            'pending': len(self._pending),
+            'total_batches': self.total_batches,
+            'total_items': self.total_items,
+            'mean_batch_size': round(self.total_items / self.total_batches, 2) if self.total_batches else 0.0,
+            'batch_size_p50': float(np.percentile(batch_sizes, 50)),
+            'batch_size_max': int(batch_sizes.max()),
+            'queue_delay_ms_p50': round(float(np.percentile(queue_delays, 50)), 3),
+            'queue_delay_ms_p99': round(float(np.percentile(queue_delays, 99)), 3)
+        }
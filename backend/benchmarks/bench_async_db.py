@@ -0,0 +1,191 @@
+"""Request concurrency against the database: sync session vs async session.
+
+Simulates the cart and order handlers under load: C concurrent clients in one
+event loop (one uvicorn worker) each repeatedly read a user's cart (cart lines
+joined to products) and order history (orders plus their items) for a fixed
+time. Each pool size is run twice:
+
+    sync   a sync Session used inside the coroutine, as the handlers did before
+           they moved to ``database.get_async_db``: every query blocks the event
+           loop, so only one runs at a time however many connections the pool has
+    async  an AsyncSession on the aiosqlite engine: a query waiting on the
+           database yields the loop, so up to N connections work in parallel
+
+Local SQLite answers these reads from memory, so to model a database across a
+network every query first pays ``--latency-ms`` of round trip, spent inside the
+database connection (a ``db_wait`` SQL function, i.e. on the driver's side:
+the calling thread for the sync driver, aiosqlite's connection thread for the
+async one). With ``--latency-ms 0`` only SQLite's own work is measured, which
+on a single core favours the sync driver (no thread hand-off per query).
+
+Reports throughput and request latency per pool size; sync should flatline
+while async scales with the connection count. A scratch SQLite database with
+the tuned pragma profile is used; the backend database is never touched.
+From the backend directory:
+
+    python benchmarks/bench_async_db.py [--connections 1 2 4 8 16] [--clients 64] [--latency-ms 2] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_pagination import populate  # noqa: E402
+from sqlalchemy import create_engine, event, func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool  # noqa: E402
+
+from database import Base, CartItem, Order, OrderItem, Product, User, apply_sqlite_profile  # noqa: E402
+
+USERS = 500
+CART_LINES = 5
+ORDERS = 3
+ORDER_LINES = 3
+
+
+def cart_query(user_id):
+    return select(CartItem, Product).join(Product, CartItem.product_id == Product.product_id) \
+        .where(CartItem.user_id == user_id)
+
+
+def orders_query(user_id):
+    return select(Order).where(Order.user_id == user_id)
+
+
+def order_items_query(order_ids):
+    return select(OrderItem.order_id, Product.product_name, OrderItem.quantity, OrderItem.price_at_time) \
+        .join(Product, OrderItem.product_id == Product.product_id).where(OrderItem.order_id.in_(order_ids))
+
+
+def add_round_trip(engine, latency_ms):
+    """Register ``db_wait(ms)`` on every connection ``engine`` opens"""
+    @event.listens_for(engine, 'connect')
+    def register_db_wait(dbapi_connection, connection_record):
+        dbapi_connection.create_function('db_wait', 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def setup_database(path, rows):
+    engine = create_engine(f'sqlite:///{path}')
+    apply_sqlite_profile(engine, 'tuned')
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    populate(session, rows)
+    rng = random.Random(7)
+    session.bulk_insert_mappings(User, [
+        {'id': user_id, 'email': f'user{user_id}@example.com', 'username': f'user{user_id}',
+         'full_name': f'User {user_id}', 'hashed_password': 'x', 'role': 'user', 'is_active': True}
+        for user_id in range(1, USERS + 1)
+    ])
+    session.bulk_insert_mappings(CartItem, [
+        {'user_id': user_id, 'product_id': product_id, 'quantity': rng.randint(1, 3)}
+        for user_id in range(1, USERS + 1) for product_id in rng.sample(range(1, rows + 1), CART_LINES)
+    ])
+    session.bulk_insert_mappings(Order, [
+        {'id': (user_id - 1) * ORDERS + n + 1, 'user_id': user_id, 'total_amount': 100.0, 'status': 'pending',
+         'shipping_address': '{}', 'payment_method': 'card'}
+        for user_id in range(1, USERS + 1) for n in range(ORDERS)
+    ])
+    session.bulk_insert_mappings(OrderItem, [
+        {'order_id': order_id, 'product_id': rng.randint(1, rows), 'quantity': 1, 'price_at_time': 10.0}
+        for order_id in range(1, USERS * ORDERS + 1) for _ in range(ORDER_LINES)
+    ])
+    session.commit()
+    session.close()
+    engine.dispose()
+
+
+async def sync_request(Session, user_id, latency_ms):
+    round_trip = select(func.db_wait(latency_ms))
+    with Session() as session:
+        session.execute(round_trip)
+        session.execute(cart_query(user_id)).all()
+        session.execute(round_trip)
+        orders = session.execute(orders_query(user_id)).scalars().all()
+        session.execute(round_trip)
+        session.execute(order_items_query([order.id for order in orders])).all()
+
+
+async def async_request(Session, user_id, latency_ms):
+    round_trip = select(func.db_wait(latency_ms))
+    async with Session() as session:
+        await session.execute(round_trip)
+        (await session.execute(cart_query(user_id))).all()
+        await session.execute(round_trip)
+        orders = (await session.execute(orders_query(user_id))).scalars().all()
+        await session.execute(round_trip)
+        (await session.execute(order_items_query([order.id for order in orders]))).all()
+
+
+async def client(request, Session, latency_ms, deadline, seed, latencies):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        # Queue behind the other clients like a newly arrived request, so time spent
+        # waiting for a blocked event loop counts towards the latency
+        await asyncio.sleep(0)
+        await request(Session, rng.randint(1, USERS), latency_ms)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(mode, path, connections, clients, latency_ms, seconds):
+    pool = {'pool_size': connections, 'max_overflow': 0, 'pool_timeout': 60}
+    if mode == 'sync':
+        engine = create_engine(f'sqlite:///{path}', poolclass=QueuePool,
+                               connect_args={'check_same_thread': False}, **pool)
+        apply_sqlite_profile(engine, 'tuned')
+        add_round_trip(engine, latency_ms)
+        Session_, request = sessionmaker(bind=engine, class_=Session), sync_request
+    else:
+        engine = create_async_engine(f'sqlite+aiosqlite:///{path}', poolclass=AsyncAdaptedQueuePool, **pool)
+        apply_sqlite_profile(engine.sync_engine, 'tuned')
+        add_round_trip(engine.sync_engine, latency_ms)
+        Session_, request = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False), async_request
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(request, Session_, latency_ms, deadline, seed, latencies) for seed in range(clients)))
+    if mode == 'sync':
+        engine.dispose()
+    else:
+        await engine.dispose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--latency-ms', type=float, default=2, help='simulated round trip per query')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        setup_database(path, args.rows)
+        print(f"{args.clients} concurrent clients, {USERS} users, {args.latency_ms:g} ms round trip per query; "
+              f"request = cart join + orders + order items\n")
+        print(f"{'session':<8}{'connections':>12}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for mode in ('sync', 'async'):
+            for connections in args.connections:
+                latencies = asyncio.run(run(mode, path, connections, args.clients, args.latency_ms, args.seconds))
+                values = np.array(latencies or [np.nan]) * 1000
+                print(f"{mode:<8}{connections:>12}{len(latencies) / args.seconds:>9.0f}"
+                      f"{np.percentile(values, 50):>9.2f}{np.percentile(values, 99):>9.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Microbenchmark of the auth dependencies with and without the auth caches.
+
+Calls the dependencies directly (no HTTP) with one valid bearer token, the
+way consecutive requests from a logged-in client would:
+
+    require_admin_role      main.py, claims only
+    verify_token            auth.py (main_full.py), claims only
+    get_current_user        main.py, claims + user lookup on the async session
+
+each with the caches off (verify the JWT and, for get_current_user, query the
+user on every call, as before ``auth_cache``), with only the principal cache,
+and with both the token and principal caches. Reports microseconds per call.
+
+Runs against a scratch SQLite database; the backend database is never
+touched. From the backend directory:
+
+    python benchmarks/bench_auth.py [--calls 20000] [--db-calls 2000]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def per_call_us(function, calls):
+    function()
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def per_call_us_async(function, calls):
+    await function()
+    started = time.perf_counter()
+    for _ in range(calls):
+        await function()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def caches(module, token_cache, principal_cache):
+    from auth_cache import PrincipalCache, TokenCache
+
+    module.token_cache = TokenCache(module.token_cache.decode, max_entries=None if token_cache else 0)
+    if principal_cache is not None:
+        module.principal_cache = PrincipalCache(ttl_seconds=None if principal_cache else 0)
+
+
+MODES = (('no caches', False, False), ('principal cache', False, True), ('token + principal', True, True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000, help='calls per claims-only measurement')
+    parser.add_argument('--db-calls', type=int, default=2000, help='calls per get_current_user measurement')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    # database.py opens ./ecommerce.db relative to the working directory
+    os.chdir(workdir)
+    try:
+        warnings.filterwarnings('ignore')
+        import auth
+        import database
+        import main
+        from fastapi.security import HTTPAuthorizationCredentials
+
+        database.create_tables()
+        db = database.SessionLocal()
+        user = database.User(email='bench@example.com', username='bench', full_name='Bench User',
+                             hashed_password='x', role='admin', is_active=True)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        db.close()
+
+        token = main.create_access_token({'sub': 'bench', 'uid': user_id, 'role': 'admin'})
+        credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+        full_token = auth.create_access_token({'sub': 'bench', 'uid': user_id, 'role': 'admin'})
+
+        print(f"{'dependency':<22}{'caches':<20}{'us/call':>10}")
+        for _, token_cache, _ in (MODES[0], MODES[2]):
+            caches(main, token_cache, None)
+            print(f"{'require_admin_role':<22}{'token' if token_cache else 'none':<20}"
+                  f"{per_call_us(lambda: main.require_admin_role(credentials), args.calls):>10.1f}")
+        for _, token_cache, _ in (MODES[0], MODES[2]):
+            caches(auth, token_cache, None)
+            print(f"{'auth.verify_token':<22}{'token' if token_cache else 'none':<20}"
+                  f"{per_call_us(lambda: auth.verify_token(full_token), args.calls):>10.1f}")
+
+        async def current_user_runs():
+            async with database.AsyncSessionLocal() as session:
+                for label, token_cache, principal_cache in MODES:
+                    caches(main, token_cache, principal_cache)
+                    elapsed = await per_call_us_async(lambda: main.get_current_user(credentials, session), args.db_calls)
+                    print(f"{'get_current_user':<22}{label:<20}{elapsed:>10.1f}")
+            await database.async_engine.dispose()
+
+        asyncio.run(current_user_runs())
+        database.engine.dispose()
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Login burst: bcrypt on the event loop vs on the bounded hashing pool.
+
+Sends a burst of ``/auth/login`` requests (C concurrent clients, correct
+passwords) to main.py's app in-process over ASGI, while a probe requests the
+cheap ``/`` endpoint every few milliseconds to see whether the rest of the API
+stays responsive. Three runs:
+
+    inline    bcrypt verification called on the event loop
+    pool      on the hashing pool with an unbounded queue
+    bounded   on the hashing pool with HASH_QUEUE_LIMIT (--queue-limit); logins
+              beyond it get 503 + Retry-After immediately
+
+Reports successful logins/s, 503s, login latency and probe latency. The probe
+latency is the point: inline, every request waits behind the whole burst.
+
+Runs against a scratch SQLite database; the backend database is never
+touched. From the backend directory:
+
+    python benchmarks/bench_login.py [--clients 32] [--logins 256] [--rounds 10] [--queue-limit 8]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+USERS = 50
+PASSWORD = 'bench-password'
+PROBE_INTERVAL = 0.005
+
+
+def percentiles_ms(values):
+    values = np.array(values or [np.nan]) * 1000
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+async def burst(client, clients, logins):
+    latencies, statuses = [], []
+    remaining = iter(range(logins))
+
+    async def login_client():
+        for n in remaining:
+            started = time.perf_counter()
+            response = await client.post('/auth/login', json={'username': f'user{n % USERS}', 'password': PASSWORD})
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+
+    probe_latencies, done = [], asyncio.Event()
+
+    async def probe():
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            scheduled += PROBE_INTERVAL
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await client.get('/')
+            # Measured from when the probe was due, so time the event loop was blocked counts too
+            probe_latencies.append(time.perf_counter() - scheduled)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login_client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return elapsed, latencies, statuses, probe_latencies
+
+
+async def run_modes(main, executors, args):
+    import httpx
+
+    from passwords import verify_and_update
+
+    pooled = main.verify_and_update_async
+
+    async def inline(password, hashed_password):
+        return verify_and_update(password, hashed_password)
+
+    print(f"{'mode':<9}{'logins/s':>9}{'503s':>6}{'login p50/p99 ms':>20}{'probe p50/p99 ms':>20}")
+    async with httpx.AsyncClient(app=main.app, base_url='http://bench') as client:
+        for mode, verify, max_queue in (('inline', inline, None), ('pool', pooled, None),
+                                        ('bounded', pooled, args.queue_limit)):
+            main.verify_and_update_async = verify
+            executors.hash_pool.max_queue = max_queue
+            elapsed, latencies, statuses, probes = await burst(client, args.clients, args.logins)
+            ok = sum(status == 200 for status in statuses)
+            login_p50, login_p99 = percentiles_ms(latencies)
+            probe_p50, probe_p99 = percentiles_ms(probes)
+            print(f"{mode:<9}{ok / elapsed:>9.1f}{statuses.count(503):>6}"
+                  f"{login_p50:>11.0f} /{login_p99:>6.0f}{probe_p50:>13.1f} /{probe_p99:>6.1f}")
+    main.verify_and_update_async = pooled
+    await main.async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=256)
+    parser.add_argument('--rounds', type=int, default=10, help='BCRYPT_ROUNDS for the benchmark users')
+    parser.add_argument('--queue-limit', type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    # database.py opens ./ecommerce.db relative to the working directory
+    os.chdir(workdir)
+    try:
+        warnings.filterwarnings('ignore')
+        import database
+        import executors
+        import main as app_module
+        from passwords import hash_password
+
+        database.create_tables()
+        db = database.SessionLocal()
+        hashed_password = hash_password(PASSWORD)
+        db.add_all([
+            database.User(email=f'user{n}@example.com', username=f'user{n}', full_name=f'User {n}',
+                          hashed_password=hashed_password, role='user', is_active=True)
+            for n in range(USERS)
+        ])
+        db.commit()
+        db.close()
+
+        print(f"{args.clients} concurrent clients, {args.logins} logins, bcrypt cost {args.rounds}, "
+              f"{executors.HASH_WORKERS} hashing workers\n")
+        asyncio.run(run_modes(app_module, executors, args))
+        executors.shutdown_pools()
+        database.engine.dispose()
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
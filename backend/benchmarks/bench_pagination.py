@@ -0,0 +1,136 @@
+"""Product listing pages: OFFSET vs keyset cursor at increasing depth.
+
+Builds a scratch SQLite database with ``--rows`` products and times fetching
+page N of each sort mode both ways: ``OFFSET (N-1)*limit`` (the old
+``/products`` query) and seeking past the cursor of the previous page (what
+``main_full.py`` now does). Both must return the same rows. With
+``--indexes`` a composite ``(sort column, product_id)`` index is created for
+each sort mode first; that is what lets a cursor seek instead of scan.
+
+The backend database is never touched. From the backend directory:
+
+    python benchmarks/bench_pagination.py [--rows 200000] [--pages 1 100 1000 5000] [--indexes]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import Index, create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, Product  # noqa: E402
+from pagination import SORT_MODES, encode_cursor, decode_cursor, order_query, seek_query  # noqa: E402
+
+# Sort modes backed by a products column (relevance needs a search term)
+COLUMN_SORTS = {sort_by: mode for sort_by, mode in SORT_MODES.items() if sort_by != 'relevance'}
+
+ADJECTIVES = ['Premium', 'Classic', 'Wireless', 'Organic', 'Vintage', 'Compact', 'Deluxe', 'Slim', 'Rugged', 'Smart']
+NOUNS = ['Headphones', 'Jacket', 'Lamp', 'Backpack', 'Sneakers', 'Blender', 'Watch', 'Desk', 'Kettle', 'Speaker']
+CATEGORIES = ['Electronics', 'Clothing', 'Home', 'Sports', 'Books']
+
+
+def populate(session, rows):
+    rng = random.Random(42)
+    started = datetime(2024, 1, 1)
+    products = []
+    for product_id in range(1, rows + 1):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}'
+        category = rng.choice(CATEGORIES)
+        products.append({
+            'product_id': product_id,
+            'product_name': name,
+            'category': category,
+            'description': f'High-quality {name} in {category} category',
+            'base_price': round(rng.uniform(5, 500), 2),
+            'inventory_level': rng.randint(0, 500),
+            'competitor_avg_price': round(rng.uniform(5, 500), 2),
+            'sales_last_30_days': rng.randint(0, 1000),
+            'rating': round(rng.uniform(1, 5), 1),
+            'review_count': rng.randint(0, 5000),
+            'season': rng.choice(['Spring', 'Summer', 'Fall', 'Winter']),
+            'brand_tier': rng.choice(['Budget', 'Mid', 'Premium']),
+            'material_cost': round(rng.uniform(1, 200), 2),
+            'target_price': round(rng.uniform(5, 500), 2),
+            'is_active': True,
+            # Coarse timestamps so 'newest' has plenty of ties for the product_id tie-breaker
+            'created_at': started + timedelta(hours=rng.randint(0, 24 * 365))
+        })
+    session.bulk_insert_mappings(Product, products)
+    session.commit()
+
+
+def create_indexes(engine):
+    for sort_by, (field, _) in COLUMN_SORTS.items():
+        Index(f'ix_bench_{sort_by}', getattr(Product, field), Product.product_id).create(bind=engine, checkfirst=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run(session, rows, pages, limit):
+    print(f"{'sort_by':<12}{'page':>8}{'offset ms':>12}{'cursor ms':>12}  same rows")
+    for sort_by, (field, descending) in COLUMN_SORTS.items():
+        column = getattr(Product, field)
+        ordered = order_query(session.query(Product).filter(Product.is_active == True),
+                              column, Product.product_id, descending)
+        for page in pages:
+            if (page - 1) * limit >= rows:
+                continue
+            # The cursor a client would hold after reading page - 1
+            previous = ordered.offset((page - 2) * limit).limit(limit).all() if page > 1 else []
+            cursor = encode_cursor(sort_by, getattr(previous[-1], field), previous[-1].product_id) if previous else None
+            session.expunge_all()
+
+            offset_ms, by_offset = timed(lambda: ordered.offset((page - 1) * limit).limit(limit).all())
+            session.expunge_all()
+
+            def by_cursor():
+                query = ordered
+                if cursor:
+                    query = seek_query(query, column, Product.product_id, descending, *decode_cursor(cursor, sort_by))
+                return query.limit(limit).all()
+            cursor_ms, by_seek = timed(by_cursor)
+            session.expunge_all()
+
+            same = [p.product_id for p in by_offset] == [p.product_id for p in by_seek]
+            print(f"{sort_by:<12}{page:>8}{offset_ms:>12.2f}{cursor_ms:>12.2f}  {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 1000, 5000])
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--indexes', action='store_true', help='create (sort column, product_id) indexes first')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    engine = create_engine(f'sqlite:///{db_path}')
+    try:
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        print(f"📦 Inserting {args.rows} products...")
+        populate(session, args.rows)
+        if args.indexes:
+            create_indexes(engine)
+        run(session, args.rows, args.pages, args.limit)
+        session.close()
+    finally:
+        engine.dispose()
+        os.remove(db_path)
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
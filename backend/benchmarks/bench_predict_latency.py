@@ -0,0 +1,63 @@
+"""Single-row prediction latency: sklearn RandomForest vs the flat-array engine.
+
+Run from the backend directory:
+
+    python benchmarks/bench_predict_latency.py [--iterations 2000]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoders import compile_encoders  # noqa: E402
+from pricing_engine import build_feature_matrix  # noqa: E402
+from tree_engine import FlatForest  # noqa: E402
+
+
+def measure(predict, rows, iterations):
+    """Per-call latencies in microseconds"""
+    latencies = []
+    for i in range(iterations):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        predict(row)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    model = joblib.load('pricing_model.pkl')
+    encoders = compile_encoders(joblib.load('label_encoders.pkl'))
+    X, valid = build_feature_matrix(pd.read_csv('dataset.csv'), encoders)
+    rows = [X[i:i + 1] for i in np.flatnonzero(valid)]
+
+    flat_forest = FlatForest.from_model(model)
+    sklearn_out = model.predict(X[valid])
+    flat_out = flat_forest.predict(X[valid])
+    print(f"🔍 Identical predictions on {len(rows)} catalog rows: {np.array_equal(sklearn_out, flat_out)}")
+
+    # Warm up both paths before timing
+    measure(model.predict, rows, 50)
+    measure(flat_forest.predict, rows, 50)
+
+    print(f"⏱️  {args.iterations} single-row predictions, {flat_forest.n_estimators} trees")
+    print(f"{'engine':<22}{'p50 (µs)':>12}{'p99 (µs)':>12}{'mean (µs)':>12}")
+    for name, predict in [('sklearn model.predict', model.predict), ('FlatForest.predict', flat_forest.predict)]:
+        latencies = measure(predict, rows, args.iterations)
+        print(f"{name:<22}{np.percentile(latencies, 50):>12.1f}{np.percentile(latencies, 99):>12.1f}{latencies.mean():>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""GET /products latency vs catalog size: re-parsing dataset.csv vs the catalog snapshot.
+
+For each catalog size a scratch dataset is generated and /products is called
+repeatedly, first with a catalog that re-parses the CSV on every request (the
+old behaviour) and then with the snapshot store. Reports the p50/p99 of the
+listing build alone and of the full HTTP request.
+
+Runs in-process against a scratch copy of the model artifacts; the backend
+directory is never modified. From the backend directory:
+
+    python benchmarks/bench_products_catalog.py [--sizes 1000 10000 50000] [--requests 20]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from catalog import CatalogStore  # noqa: E402
+
+
+class ReparsingCatalog(CatalogStore):
+    """Parses the file on every access, like the old per-request pd.read_csv"""
+
+    def snapshot(self):
+        self._snapshot = None
+        return self.refresh()
+
+
+def write_dataset(workdir, rows):
+    df = pd.read_csv(os.path.join(BACKEND_DIR, 'dataset.csv'))
+    repeats = max(1, -(-rows // len(df)))
+    df = pd.concat([df] * repeats, ignore_index=True).head(rows)
+    df['product_id'] = np.arange(1, len(df) + 1)
+    df.to_csv(os.path.join(workdir, 'dataset.csv'), index=False)
+
+
+def percentiles(latencies):
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+async def measure(main, client, requests):
+    build_latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        main.build_product_listing(main.catalog.snapshot(), main.active_bundle)
+        build_latencies.append(time.perf_counter() - start)
+
+    http_latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get('/products')
+        response.raise_for_status()
+        http_latencies.append(time.perf_counter() - start)
+    return percentiles(build_latencies), percentiles(http_latencies)
+
+
+async def run(args, workdir):
+    import httpx
+    import main
+
+    main.load_model()
+    print(f"{'rows':>8}  {'catalog':<10}{'build p50':>11}{'build p99':>11}{'http p50':>11}{'http p99':>11}  (ms)")
+    async with httpx.AsyncClient(app=main.app, base_url='http://bench', timeout=None) as client:
+        for rows in args.sizes:
+            write_dataset(workdir, rows)
+            for label, store in (('reparse', ReparsingCatalog()), ('snapshot', CatalogStore())):
+                main.catalog = store
+                main.refresh_price_table(main.active_bundle)
+                (build_p50, build_p99), (http_p50, http_p99) = await measure(main, client, args.requests)
+                print(f"{rows:>8}  {label:<10}{build_p50:>11.2f}{build_p99:>11.2f}{http_p50:>11.1f}{http_p99:>11.1f}")
+    main.shutdown_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    for artifact in ('pricing_model.pkl', 'label_encoders.pkl', 'model_metadata.json'):
+        shutil.copy(os.path.join(BACKEND_DIR, artifact), workdir)
+    os.chdir(workdir)
+    try:
+        asyncio.run(run(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
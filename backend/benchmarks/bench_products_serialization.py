@@ -0,0 +1,115 @@
+"""/products serialization time and bytes on the wire: default path vs fast responses.
+
+For each catalog size a scratch dataset is generated and the priced listing is
+built once. The listing is then serialized the default way (``jsonable_encoder``
+plus Starlette's ``JSONResponse``) and with ``fast_response.dumps`` (orjson), and
+the body is compressed with every encoding available. Finally /products is
+called over HTTP with ``FAST_RESPONSES`` off and on; with it on, the encoded
+body is memoized per catalog snapshot, so repeat requests skip serialization.
+
+Runs in-process against a scratch copy of the model artifacts; the backend
+directory is never modified. From the backend directory:
+
+    python benchmarks/bench_products_serialization.py [--sizes 10000 50000] [--requests 10]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_products_catalog import write_dataset  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import fast_response  # noqa: E402
+
+
+def timed(fn, repeats):
+    """Median wall time of ``fn()`` in ms, and its last result"""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - start)
+    return np.median(latencies) * 1000, result
+
+
+def report_serialization(listing, repeats):
+    content = {"products": listing}
+    default_ms, default_body = timed(lambda: JSONResponse(jsonable_encoder(content)).body, repeats)
+    fast_ms, fast_body = timed(lambda: fast_response.dumps(content), repeats)
+    print(f"  {'jsonable_encoder + json':<26}{default_ms:>10.1f} ms{len(default_body) / 1024:>12.1f} KiB")
+    print(f"  {'fast_response.dumps':<26}{fast_ms:>10.1f} ms{len(fast_body) / 1024:>12.1f} KiB"
+          f"   identical bytes: {fast_body == default_body}")
+    for encoding in fast_response.SUPPORTED_ENCODINGS:
+        ms, compressed = timed(lambda: fast_response.compress(fast_body, encoding), repeats)
+        print(f"  {'  + ' + encoding:<26}{ms:>10.1f} ms{len(compressed) / 1024:>12.1f} KiB"
+              f"   ({len(compressed) / len(fast_body):.1%} of identity)")
+
+
+async def report_http(main, client, requests, accept_encoding):
+    latencies, wire_bytes = [], 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get('/products', headers={'accept-encoding': accept_encoding})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        wire_bytes = len(response.content) if 'content-encoding' not in response.headers else \
+            int(response.headers['content-length'])
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), wire_bytes
+
+
+async def run(args, workdir):
+    import httpx
+    import main
+    from catalog import CatalogStore
+
+    main.load_model()
+    async with httpx.AsyncClient(app=main.app, base_url='http://bench', timeout=None) as client:
+        for rows in args.sizes:
+            write_dataset(workdir, rows)
+            main.catalog = CatalogStore()
+            main.refresh_price_table(main.active_bundle)
+            listing = main.build_product_listing(main.catalog.snapshot(), main.active_bundle)
+
+            print(f"\n{rows} products — serialization (median of {args.requests})")
+            report_serialization(listing, args.requests)
+
+            print(f"{rows} products — GET /products{'http p50':>14}{'http p99':>11}{'wire KiB':>11}")
+            for fast, accept_encoding in ((False, 'identity'), (True, 'identity'), (True, 'gzip, br')):
+                main.FAST_RESPONSES = fast
+                p50, p99, wire_bytes = await report_http(main, client, args.requests, accept_encoding)
+                label = f"{'fast' if fast else 'default'} ({accept_encoding})"
+                print(f"  {label:<30}{p50:>11.1f}{p99:>11.1f}{wire_bytes / 1024:>11.1f}")
+    main.shutdown_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--requests', type=int, default=10)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    for artifact in ('pricing_model.pkl', 'label_encoders.pkl', 'model_metadata.json'):
+        shutil.copy(os.path.join(BACKEND_DIR, artifact), workdir)
+    os.chdir(workdir)
+    try:
+        asyncio.run(run(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
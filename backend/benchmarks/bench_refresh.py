@@ -0,0 +1,111 @@
+"""Renewing an access token: password login vs refresh token.
+
+A client whose access token ran out either logs in again (a bcrypt
+verification on the hashing pool) or posts its refresh token to
+``/auth/refresh`` (a signature check, a revocation lookup and a user lookup).
+Sends the same number of each to main.py's app in-process over ASGI, from C
+concurrent clients, and reports requests/s and latency. Each refresh uses the
+token returned by that user's first login, the way a client would.
+
+Runs against a scratch SQLite database; the backend database is never
+touched. From the backend directory:
+
+    python benchmarks/bench_refresh.py [--clients 8] [--requests 200] [--rounds 12]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+USERS = 20
+PASSWORD = 'bench-password'
+
+
+async def run(client, clients, requests, send):
+    latencies, statuses = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for n in remaining:
+            started = time.perf_counter()
+            response = await send(n % USERS)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return time.perf_counter() - started, latencies, statuses
+
+
+async def run_modes(main, args):
+    import httpx
+
+    async with httpx.AsyncClient(app=main.app, base_url='http://bench') as client:
+        refresh_tokens = []
+        for n in range(USERS):
+            response = await client.post('/auth/login', json={'username': f'user{n}', 'password': PASSWORD})
+            refresh_tokens.append(response.json()['refresh_token'])
+
+        modes = (
+            ('login', lambda n: client.post('/auth/login', json={'username': f'user{n}', 'password': PASSWORD})),
+            ('refresh', lambda n: client.post('/auth/refresh', json={'refresh_token': refresh_tokens[n]})),
+        )
+        print(f"{'renewal':<9}{'req/s':>9}{'non-200':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for mode, send in modes:
+            elapsed, latencies, statuses = await run(client, args.clients, args.requests, send)
+            values = np.array(latencies) * 1000
+            print(f"{mode:<9}{len(latencies) / elapsed:>9.1f}{sum(status != 200 for status in statuses):>9}"
+                  f"{np.percentile(values, 50):>9.1f}{np.percentile(values, 99):>9.1f}")
+    await main.async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=12, help='BCRYPT_ROUNDS for the benchmark users')
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    # database.py opens ./ecommerce.db relative to the working directory
+    os.chdir(workdir)
+    try:
+        warnings.filterwarnings('ignore')
+        import database
+        import executors
+        import main as app_module
+        from passwords import hash_password
+
+        database.create_tables()
+        db = database.SessionLocal()
+        hashed_password = hash_password(PASSWORD)
+        db.add_all([
+            database.User(email=f'user{n}@example.com', username=f'user{n}', full_name=f'User {n}',
+                          hashed_password=hashed_password, role='user', is_active=True)
+            for n in range(USERS)
+        ])
+        db.commit()
+        db.close()
+
+        print(f"{args.clients} concurrent clients, {args.requests} requests each way, bcrypt cost {args.rounds}, "
+              f"{executors.HASH_WORKERS} hashing workers\n")
+        asyncio.run(run_modes(app_module, args))
+        executors.shutdown_pools()
+        database.engine.dispose()
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Product search latency: ILIKE scan vs the FTS5 index with BM25 ranking.
+
+Builds a scratch SQLite database with ``--rows`` products and runs each search
+term (as typed, keystroke by keystroke) the old way, ``ILIKE '%term%'`` over
+name and category sorted by popularity, and through ``products_fts`` ranked
+by BM25, both returning the first page of active products. Optionally combined
+with a category filter.
+
+The backend database is never touched. From the backend directory:
+
+    python benchmarks/bench_search.py [--rows 200000] [--terms "wireless head" lamp] [--category Home]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_pagination import populate  # noqa: E402
+from sqlalchemy import asc, create_engine, desc, or_  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, Product  # noqa: E402
+from search_index import create_search_index, search_products  # noqa: E402
+
+
+def keystrokes(term):
+    """Every prefix of at least 3 characters, as a search-as-you-type box sends them"""
+    return [term[:end] for end in range(3, len(term) + 1)]
+
+
+def base_query(session, category):
+    query = session.query(Product).filter(Product.is_active == True)
+    if category:
+        query = query.filter(Product.category == category)
+    return query
+
+
+def ilike_search(session, term, category, limit):
+    pattern = f'%{term}%'
+    query = base_query(session, category).filter(
+        or_(Product.product_name.ilike(pattern), Product.category.ilike(pattern))
+    )
+    return query.order_by(desc(Product.sales_last_30_days)).limit(limit).all()
+
+
+def fts_search(session, term, category, limit):
+    query, rank = search_products(base_query(session, category), Product.product_id, term)
+    return query.order_by(asc(rank), asc(Product.product_id)).limit(limit).all()
+
+
+def measure(session, search, terms, category, limit, repeats):
+    latencies = []
+    for term in terms:
+        for prefix in keystrokes(term):
+            for _ in range(repeats):
+                start = time.perf_counter()
+                search(session, prefix, category, limit)
+                latencies.append(time.perf_counter() - start)
+                session.expunge_all()
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--terms', nargs='+', default=['wireless head', 'vintage lamp', 'sneakers'])
+    parser.add_argument('--category', default=None)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    engine = create_engine(f'sqlite:///{db_path}')
+    try:
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        print(f"📦 Inserting {args.rows} products...")
+        populate(session, args.rows)
+        started = time.perf_counter()
+        if not create_search_index(engine):
+            print("❌ FTS5 is not available in this SQLite build")
+            return
+        print(f"🔎 Built the FTS5 index in {(time.perf_counter() - started):.1f} s")
+
+        for term in args.terms:
+            top = [p.product_name for p in fts_search(session, term, args.category, 3)]
+            print(f"   '{term}' -> {top}")
+        print(f"\n{'search':<10}{'p50 ms':>10}{'p99 ms':>10}   (category: {args.category or 'any'})")
+        for label, search in (('ILIKE', ilike_search), ('FTS5', fts_search)):
+            p50, p99 = measure(session, search, args.terms, args.category, args.limit, args.repeats)
+            print(f"{label:<10}{p50:>10.2f}{p99:>10.2f}")
+        session.close()
+    finally:
+        engine.dispose()
+        os.remove(db_path)
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Mixed read/write SQLite traffic: default vs tuned pragma profile.
+
+For each profile (see ``database.SQLITE_PROFILES``) a scratch database is
+created and populated, then N threads, each with its own session like a
+request handler, run a mix of product listing and cart reads, cart writes and
+checkouts (order + order items + cart clear in one transaction) for a fixed
+time. Reports throughput, per-operation latency and how many operations
+failed with "database is locked".
+
+The backend database is never touched. From the backend directory:
+
+    python benchmarks/bench_sqlite_profiles.py [--threads 1 4 16] [--seconds 5] [--rows 20000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_pagination import populate  # noqa: E402
+from sqlalchemy import create_engine, desc  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, CartItem, Order, OrderItem, Product, User, apply_sqlite_profile  # noqa: E402
+
+USERS = 200
+
+# operation -> share of the traffic
+MIX = {'list_products': 0.55, 'read_cart': 0.2, 'add_to_cart': 0.18, 'checkout': 0.07}
+
+
+def list_products(session, rng, rows):
+    session.query(Product).filter(Product.is_active == True) \
+        .order_by(desc(Product.sales_last_30_days), desc(Product.product_id)).limit(20).all()
+
+
+def read_cart(session, rng, rows):
+    session.query(CartItem).filter(CartItem.user_id == rng.randint(1, USERS)).all()
+
+
+def add_to_cart(session, rng, rows):
+    user_id, product_id = rng.randint(1, USERS), rng.randint(1, rows)
+    item = session.query(CartItem).filter(CartItem.user_id == user_id, CartItem.product_id == product_id).first()
+    if item:
+        item.quantity += 1
+    else:
+        session.add(CartItem(user_id=user_id, product_id=product_id, quantity=1))
+    session.commit()
+
+
+def checkout(session, rng, rows):
+    user_id = rng.randint(1, USERS)
+    items = session.query(CartItem).filter(CartItem.user_id == user_id).all()
+    if not items:
+        items = [CartItem(user_id=user_id, product_id=rng.randint(1, rows), quantity=1)]
+    order = Order(user_id=user_id, total_amount=10.0 * len(items), shipping_address='1 Bench St', payment_method='card')
+    session.add(order)
+    session.flush()
+    for item in items:
+        session.add(OrderItem(order_id=order.id, product_id=item.product_id, quantity=item.quantity, price_at_time=10.0))
+    session.query(CartItem).filter(CartItem.user_id == user_id).delete()
+    session.commit()
+
+
+OPERATIONS = {'list_products': list_products, 'read_cart': read_cart, 'add_to_cart': add_to_cart, 'checkout': checkout}
+
+
+def setup_database(path, profile, rows):
+    engine = create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+    apply_sqlite_profile(engine, profile)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    populate(session, rows)
+    session.bulk_insert_mappings(User, [
+        {'id': user_id, 'email': f'user{user_id}@example.com', 'username': f'user{user_id}',
+         'full_name': f'User {user_id}', 'hashed_password': 'x', 'role': 'user', 'is_active': True}
+        for user_id in range(1, USERS + 1)
+    ])
+    session.commit()
+    session.close()
+    return engine
+
+
+def worker(Session, rows, deadline, seed, latencies, errors, lock):
+    rng = random.Random(seed)
+    names, weights = list(MIX), list(MIX.values())
+    local_latencies, local_errors = defaultdict(list), defaultdict(int)
+    session = Session()
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](session, rng, rows)
+        except OperationalError as e:
+            session.rollback()
+            local_errors['locked' if 'locked' in str(e) else 'other'] += 1
+            continue
+        local_latencies[name].append(time.perf_counter() - start)
+    session.close()
+    with lock:
+        for name, values in local_latencies.items():
+            latencies[name].extend(values)
+        for kind, count in local_errors.items():
+            errors[kind] += count
+
+
+def run(engine, rows, threads, seconds):
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    latencies, errors, lock = defaultdict(list), defaultdict(int), threading.Lock()
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(Session, rows, deadline, seed, latencies, errors, lock))
+            for seed in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'tuned'])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    try:
+        print(f"{'profile':<9}{'threads':>8}{'ops/s':>9}{'locked':>8}  "
+              + ''.join(f"{name + ' p50/p99':>26}" for name in MIX) + "  (ms)")
+        for profile in args.profiles:
+            engine = setup_database(os.path.join(workdir, f'{profile}.db'), profile, args.rows)
+            for threads in args.threads:
+                latencies, errors = run(engine, args.rows, threads, args.seconds)
+                total = sum(len(values) for values in latencies.values())
+                cells = ''
+                for name in MIX:
+                    values = np.array(latencies.get(name) or [np.nan]) * 1000
+                    cells += f"{np.percentile(values, 50):>15.2f} /{np.percentile(values, 99):>8.1f}"
+                print(f"{profile:<9}{threads:>8}{total / args.seconds:>9.0f}{errors['locked']:>8}  {cells}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
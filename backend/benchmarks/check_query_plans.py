@@ -0,0 +1,187 @@
+"""Check that every hot query is served by an index (EXPLAIN QUERY PLAN).
+
+Migrates a scratch SQLite database to head with Alembic, then runs
+``EXPLAIN QUERY PLAN`` for each hot query (product listings for every sort
+mode and filter, keyset pages, cart, orders, order items, reviews, dashboard
+counts) and checks that the plan uses the expected index, never scans a table
+and never sorts in a temporary B-tree. Then follows the keyset cursors through
+a seeded listing in every sort mode (ties on every sort column, creation times
+stored both as ``CURRENT_TIMESTAMP`` and by SQLAlchemy) and checks that each
+traversal ends and serves every product exactly once. Exits with status 1 if
+anything regresses, so it can run in CI after schema changes.
+
+The backend database is never touched. From the backend directory:
+
+    python benchmarks/check_query_plans.py [--verbose]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def hot_queries(session):
+    """(label, query, index the plan must use)"""
+    from sqlalchemy import desc
+
+    from database import CartItem, Order, OrderItem, Product, Review
+    from pagination import SORT_MODES, keyset_column, order_query, seek_query
+
+    active = session.query(Product).filter(Product.is_active == True)
+    queries = []
+    for sort_by, index in (('popularity', 'ix_products_active_popularity'),
+                           ('price_low', 'ix_products_active_price'),
+                           ('price_high', 'ix_products_active_price'),
+                           ('rating', 'ix_products_active_rating'),
+                           ('newest', 'ix_products_active_newest')):
+        field, descending = SORT_MODES[sort_by]
+        column = keyset_column(getattr(Product, field))
+        ordered = order_query(active, column, Product.product_id, descending)
+        queries.append((f'products sort_by={sort_by}', ordered.limit(21), index))
+        value = '2025-01-01 00:00:00' if field == 'created_at' else 100
+        page = seek_query(ordered, column, Product.product_id, descending, value, 500)
+        queries.append((f'products sort_by={sort_by} after cursor', page.limit(21), index))
+
+    popularity = (Product.sales_last_30_days, Product.product_id, True)
+    for label, criterion, index in (('category', Product.category == 'Electronics', 'ix_products_active_category'),
+                                    ('brand_tier', Product.brand_tier == 'Premium', 'ix_products_active_brand_tier'),
+                                    ('season', Product.season == 'Summer', 'ix_products_active_season')):
+        filtered = order_query(active.filter(criterion), *popularity)
+        queries.append((f'products {label}= sort_by=popularity', filtered.limit(21), index))
+        queries.append((f'products {label}= after cursor',
+                        seek_query(filtered, *popularity, 100, 500).limit(21), index))
+
+    queries += [
+        ('dashboard active product count', active.with_entities(Product.product_id), 'ix_products_active_'),
+        ('cart items for user', session.query(CartItem).filter(CartItem.user_id == 1), 'uq_cart_items_user_product'),
+        ('cart line for user and product',
+         session.query(CartItem).filter(CartItem.user_id == 1, CartItem.product_id == 2), 'uq_cart_items_user_product'),
+        ('orders for user, newest first',
+         session.query(Order).filter(Order.user_id == 1).order_by(desc(Order.created_at)), 'ix_orders_user_created'),
+        ('recent orders (admin)', session.query(Order).order_by(desc(Order.created_at)).limit(5), 'ix_orders_created_at'),
+        ('items of an order', session.query(OrderItem).filter(OrderItem.order_id == 1), 'ix_order_items_order_id'),
+        ('reviews for product, newest first',
+         session.query(Review).filter(Review.product_id == 1).order_by(desc(Review.created_at)),
+         'ix_reviews_product_created'),
+    ]
+    return queries
+
+
+def explain(session, query):
+    statement = query.statement.compile(dialect=session.bind.dialect, compile_kwargs={'literal_binds': True})
+    rows = session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}').fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(plan, index):
+    problems = []
+    if not any(index in step for step in plan):
+        problems.append(f'does not use {index}')
+    for step in plan:
+        if step.startswith('SCAN') and 'INDEX' not in step:
+            problems.append(f'full table scan: {step}')
+        if 'TEMP B-TREE' in step:
+            problems.append(f'sorts in memory: {step}')
+    return problems
+
+
+TRAVERSAL_PRODUCTS = 60
+TRAVERSAL_PAGE = 7
+
+
+def seed_products(session):
+    """Active products with many ties; half get created_at from the server default, all in one second"""
+    from datetime import datetime
+
+    from database import Product
+
+    created_at = datetime.utcnow().replace(microsecond=0)
+    for n in range(TRAVERSAL_PRODUCTS):
+        product = Product(product_name=f'Product {n}', category='Electronics', brand_tier='Premium', season='Summer',
+                          base_price=float(10 + n % 4), competitor_avg_price=10.0, material_cost=5.0,
+                          target_price=10.0, inventory_level=5, sales_last_30_days=n % 3,
+                          rating=4.0 + n % 2 / 2, review_count=10, is_active=True)
+        if n % 2:
+            product.created_at = created_at
+        session.add(product)
+    session.commit()
+
+
+def traversal_problems(session, sort_by):
+    """Follow next-page cursors the way get_products does; problems if a page repeats or it never ends"""
+    from database import Product
+    from pagination import SORT_MODES, decode_cursor, encode_cursor, keyset_column, order_query, seek_query
+
+    field, descending = SORT_MODES[sort_by]
+    column = keyset_column(getattr(Product, field))
+    ordered = order_query(session.query(Product.product_id, column).filter(Product.is_active == True),
+                          column, Product.product_id, descending)
+    seen, cursor = [], None
+    for _ in range(TRAVERSAL_PRODUCTS + 1):
+        query = ordered
+        if cursor:
+            value, product_id = decode_cursor(cursor, sort_by)
+            query = seek_query(query, column, Product.product_id, descending, value, product_id)
+        rows = query.limit(TRAVERSAL_PAGE + 1).all()
+        seen += [product_id for product_id, _ in rows[:TRAVERSAL_PAGE]]
+        if len(rows) <= TRAVERSAL_PAGE:
+            break
+        cursor = encode_cursor(sort_by, *rows[TRAVERSAL_PAGE - 1][::-1])
+    else:
+        return [f'still paging after {TRAVERSAL_PRODUCTS + 1} pages ({len(set(seen))} distinct products)']
+
+    problems = []
+    if len(seen) != len(set(seen)):
+        problems.append(f'{len(seen) - len(set(seen))} products served twice')
+    if len(set(seen)) != TRAVERSAL_PRODUCTS:
+        problems.append(f'served {len(set(seen))} of {TRAVERSAL_PRODUCTS} products')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pricing-plans-')
+    os.chdir(workdir)
+    failures = 0
+    try:
+        # database.py opens ./ecommerce.db relative to the working directory
+        import database
+        database.run_migrations()
+        session = database.SessionLocal()
+        for label, query, index in hot_queries(session):
+            plan = explain(session, query)
+            problems = plan_problems(plan, index)
+            failures += bool(problems)
+            print(f"{'❌' if problems else '✅'} {label}")
+            for problem in problems:
+                print(f"     {problem}")
+            if args.verbose or problems:
+                for step in plan:
+                    print(f"     | {step}")
+        
+        seed_products(session)
+        for sort_by in ('popularity', 'price_low', 'price_high', 'rating', 'newest'):
+            problems = traversal_problems(session, sort_by)
+            failures += bool(problems)
+            print(f"{'❌' if problems else '✅'} keyset traversal sort_by={sort_by}")
+            for problem in problems:
+                print(f"     {problem}")
+        session.close()
+        database.engine.dispose()
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'❌' if failures else '✅'} {failures} hot queries without a usable index plan or broken traversals")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
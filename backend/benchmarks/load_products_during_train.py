@@ -0,0 +1,126 @@
+"""Load test: /products latency while /train runs.
+
+Polls GET /products back to back, first with the server idle and then while a
+training job started by POST /train is running, and reports the latency
+distribution of both. Pass ``--inline`` to train on the event loop instead
+(the old behaviour) to see the stall that the worker pools remove.
+
+Runs in-process against a scratch copy of the model artifacts; the backend
+directory is never modified. From the backend directory:
+
+    python benchmarks/load_products_during_train.py [--rows 5000] [--inline]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def prepare_workdir(rows):
+    """Scratch directory with a dataset of ``rows`` products and the current model"""
+    workdir = tempfile.mkdtemp(prefix='pricing-bench-')
+    df = pd.read_csv(os.path.join(BACKEND_DIR, 'dataset.csv'))
+    repeats = max(1, rows // len(df))
+    df = pd.concat([df] * repeats, ignore_index=True)
+    df['product_id'] = np.arange(1, len(df) + 1)
+    df.to_csv(os.path.join(workdir, 'dataset.csv'), index=False)
+    for artifact in ('pricing_model.pkl', 'label_encoders.pkl'):
+        shutil.copy(os.path.join(BACKEND_DIR, artifact), workdir)
+    return workdir
+
+
+def summarize(label, latencies):
+    latencies = np.array(latencies) * 1000
+    print(f"{label:<18}{len(latencies):>8}{np.percentile(latencies, 50):>12.1f}"
+          f"{np.percentile(latencies, 99):>12.1f}{latencies.max():>12.1f}")
+
+
+async def poll_products(client, stop):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get('/products')
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def start_training_job(client, headers):
+    """POST /train and poll the job until it finishes"""
+    response = await client.post('/train', headers=headers)
+    response.raise_for_status()
+    job = response.json()['job']
+    while job['status'] in ('queued', 'running'):
+        await asyncio.sleep(0.2)
+        response = await client.get(f"/train/jobs/{job['job_id']}", headers=headers)
+        response.raise_for_status()
+        job = response.json()
+    return job
+
+
+async def run(args):
+    import httpx
+    import main
+
+    main.load_model()
+    token = main.create_access_token({"sub": "admin", "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(app=main.app, base_url='http://bench', timeout=None) as client:
+        stop = asyncio.Event()
+        idle = asyncio.create_task(poll_products(client, stop))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        idle_latencies = await idle
+
+        stop = asyncio.Event()
+        during = asyncio.create_task(poll_products(client, stop))
+        train_start = time.perf_counter()
+        if args.inline:
+            await asyncio.sleep(0.1)
+            main.train_model()
+        else:
+            job = await start_training_job(client, headers)
+        train_seconds = time.perf_counter() - train_start
+        stop.set()
+        during_latencies = await during
+
+    if not args.inline and job['status'] != 'succeeded':
+        raise RuntimeError(f"Training job ended with status {job['status']}: {job['error']}")
+
+    print(f"🏋️  Training took {train_seconds:.2f}s ({'inline on the event loop' if args.inline else 'process pool'})")
+    print(f"{'phase':<18}{'requests':>8}{'p50 (ms)':>12}{'p99 (ms)':>12}{'max (ms)':>12}")
+    summarize('idle', idle_latencies)
+    summarize('during /train', during_latencies)
+    main.shutdown_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='catalog size used for training')
+    parser.add_argument('--idle-seconds', type=float, default=3.0)
+    parser.add_argument('--inline', action='store_true', help='train on the event loop (pre-executor behaviour)')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    workdir = prepare_workdir(args.rows)
+    os.chdir(workdir)
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
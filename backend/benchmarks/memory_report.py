@@ -0,0 +1,147 @@
+"""Per-worker memory: unpickled sklearn model vs memory-mapped flat forest.
+
+Starts N worker processes that each load the model the way a uvicorn worker
+would and score a batch of products, then reports every worker's RSS and PSS
+(proportional set size: shared pages are split between the processes mapping
+them) before and after loading. With the pickle each worker pays for its own
+copy of the forest; with the memory-mapped node arrays the pages come from one
+shared page-cache copy, so PSS per worker shrinks as workers are added.
+
+Artifacts are written to a scratch directory; the backend directory is never
+modified.
+From the backend directory:
+
+    python benchmarks/memory_report.py [--workers 4] [--fit-rows 50000]
+
+``--fit-rows`` fits a forest with the production hyperparameters on that many
+jittered catalog rows, to report a model closer to production size than the
+bundled demo model. Linux only (reads /proc).
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def memory_usage():
+    """Current process RSS and PSS in MiB (PSS is None where smaps_rollup is unavailable)"""
+    usage = {'rss': None, 'pss': None}
+    fields = {'Rss:': 'rss', 'Pss:': 'pss'}
+    path = '/proc/self/smaps_rollup' if os.path.exists('/proc/self/smaps_rollup') else '/proc/self/status'
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] in fields:
+                usage[fields[parts[0]]] = int(parts[1]) / 1024
+            elif parts and parts[0] == 'VmRSS:':
+                usage['rss'] = int(parts[1]) / 1024
+    return usage
+
+
+def worker(mode, model_path, forest_path, X, barrier, results):
+    warnings.filterwarnings('ignore')
+    from tree_engine import FlatForest
+
+    # Baseline and final readings are both taken with every worker alive
+    barrier.wait()
+    before = memory_usage()
+    barrier.wait()
+    if mode == 'pickle':
+        predictor = joblib.load(model_path)
+    else:
+        predictor = FlatForest.load(forest_path, mmap_mode='r')
+    predictor.predict(X)
+
+    barrier.wait()
+    after = memory_usage()
+    results.put((os.getpid(), before, after))
+    barrier.wait()
+
+
+def build_model(workdir, fit_rows):
+    """Model artifacts to load, plus a feature matrix to score"""
+    from encoders import compile_encoders
+    from pricing_engine import NUMERIC_FEATURES, build_feature_matrix
+    from tree_engine import FlatForest
+
+    df = pd.read_csv(os.path.join(BACKEND_DIR, 'dataset.csv'))
+    encoders = compile_encoders(joblib.load(os.path.join(BACKEND_DIR, 'label_encoders.pkl')))
+    model = joblib.load(os.path.join(BACKEND_DIR, 'pricing_model.pkl'))
+
+    if fit_rows:
+        from sklearn.ensemble import RandomForestRegressor
+        rng = np.random.default_rng(42)
+        df = df.sample(fit_rows, replace=True, random_state=42).reset_index(drop=True)
+        for col in NUMERIC_FEATURES + ['target_price']:
+            df[col] = df[col] * rng.normal(1.0, 0.05, len(df))
+        X_train, _ = build_feature_matrix(df, encoders)
+        model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1)
+        model.fit(X_train, df['target_price'])
+
+    model_path = os.path.join(workdir, 'pricing_model.pkl')
+    forest_path = os.path.join(workdir, 'flat_forest.joblib')
+    joblib.dump(model, model_path)
+    FlatForest.from_model(model).save(forest_path)
+    X, _ = build_feature_matrix(df.head(1000), encoders)
+    return model_path, forest_path, X
+
+
+def run_workers(mode, workers, model_path, forest_path, X):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, model_path, forest_path, X, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+def report(mode, measurements):
+    print(f"\n{mode}")
+    print(f"{'worker pid':<12}{'RSS before':>12}{'RSS after':>12}{'PSS before':>12}{'PSS after':>12}  (MiB)")
+    for pid, before, after in measurements:
+        pss_before = f"{before['pss']:>12.1f}" if before['pss'] is not None else f"{'n/a':>12}"
+        pss_after = f"{after['pss']:>12.1f}" if after['pss'] is not None else f"{'n/a':>12}"
+        print(f"{pid:<12}{before['rss']:>12.1f}{after['rss']:>12.1f}{pss_before}{pss_after}")
+
+    key = 'pss' if measurements[0][2]['pss'] is not None else 'rss'
+    growth = [after[key] - before[key] for _, before, after in measurements]
+    print(f"model {key.upper()} per worker: {np.mean(growth):.1f} MiB, all workers: {np.sum(growth):.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--fit-rows', type=int, default=0, help='fit a larger forest on this many jittered rows')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    workdir = tempfile.mkdtemp(prefix='pricing-memory-')
+    try:
+        model_path, forest_path, X = build_model(workdir, args.fit_rows)
+        print(f"📦 pickle: {os.path.getsize(model_path) / 2**20:.1f} MiB, "
+              f"flat forest: {os.path.getsize(forest_path) / 2**20:.1f} MiB, {args.workers} workers")
+        report('joblib.load(pricing_model.pkl)', run_workers('pickle', args.workers, model_path, forest_path, X))
+        report("FlatForest.load(mmap_mode='r')", run_workers('mmap', args.workers, model_path, forest_path, X))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
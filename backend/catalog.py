@@ -0,0 +1,150 @@
+"""In-memory snapshot of the product catalog (dataset.csv).
+
+``/products`` used to run ``pd.read_csv`` on every request. The catalog is now
+parsed once into an immutable ``CatalogSnapshot`` that keeps each listing
+column as a plain Python list (what the listing endpoint reads directly), the
+DataFrame used for scoring, and the per-row price-table hashes. The store
+re-parses the file only when its mtime or size changes (a cheap ``os.stat``
+per access, which also catches writes made by other worker processes) or when
+``/upload-data`` replaces it through ``CatalogStore.replace``.
+
+Anything derived from a snapshot, such as the priced listing for a model
+version, can be memoized on the snapshot itself; it is dropped together with
+the snapshot when the catalog changes.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from price_table import hash_rows
+
+CATALOG_PATH = os.getenv('CATALOG_PATH', 'dataset.csv')
+
+# Listing columns and the Python type each value is served as
+INT_COLUMNS = ['product_id', 'inventory_level', 'review_count', 'sales_last_30_days']
+FLOAT_COLUMNS = ['base_price', 'target_price', 'rating', 'competitor_avg_price', 'material_cost']
+TEXT_COLUMNS = ['product_name', 'category', 'season', 'brand_tier']
+
+# Derived values memoized per snapshot (listings and their encoded bodies for the last few model versions)
+MAX_MEMO_ENTRIES = 16
+
+
+class CatalogSnapshot:
+    """Immutable, parsed view of one version of the catalog file"""
+
+    def __init__(self, version, frame, content_hash, source_signature):
+        self.version = version
+        self.frame = frame
+        self.content_hash = content_hash
+        self.source_signature = source_signature
+        self.loaded_at = time.time()
+        self.row_count = len(frame)
+
+        self.columns = {}
+        for col in INT_COLUMNS:
+            self.columns[col] = frame[col].astype('int64').tolist()
+        for col in FLOAT_COLUMNS:
+            self.columns[col] = frame[col].astype('float64').tolist()
+        for col in TEXT_COLUMNS:
+            self.columns[col] = frame[col].tolist()
+        self.row_hashes = hash_rows(frame)
+
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, version, data, source_signature=None):
+        frame = pd.read_csv(io.BytesIO(data))
+        return cls(version, frame, hashlib.sha1(data).hexdigest(), source_signature)
+
+    def memo(self, key, compute):
+        """Value of ``compute()`` cached on this snapshot under ``key``"""
+        with self._memo_lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = compute()
+        with self._memo_lock:
+            if len(self._memo) >= MAX_MEMO_ENTRIES:
+                self._memo.pop(next(iter(self._memo)))
+            self._memo[key] = value
+        return value
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'content_hash': self.content_hash,
+            'rows': self.row_count,
+            'loaded_at': self.loaded_at
+        }
+
+
+class CatalogStore:
+    """Holds the current catalog snapshot and reloads it when the file changes"""
+
+    def __init__(self, path=None):
+        self.path = path or CATALOG_PATH
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self.reloads = 0
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def snapshot(self):
+        """Current snapshot; re-parses the file only if its mtime or size changed"""
+        snapshot = self._snapshot
+        signature = self._signature()
+        if snapshot is not None and snapshot.source_signature == signature:
+            return snapshot
+        if signature is None:
+            raise FileNotFoundError(f"Catalog file '{self.path}' not found")
+        return self.refresh()
+
+    def refresh(self):
+        """Re-read the catalog file now and publish it as a new snapshot version"""
+        with self._lock:
+            signature = self._signature()
+            if self._snapshot is not None and self._snapshot.source_signature == signature:
+                return self._snapshot
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            self._version += 1
+            self._snapshot = CatalogSnapshot.from_bytes(self._version, data, signature)
+            self.reloads += 1
+            return self._snapshot
+
+    def replace(self, df):
+        """Atomically write a new catalog file and publish it.
+
+        Readers in this or any other process see either the old file or the
+        complete new one, never a partially written CSV.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                df.to_csv(f, index=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.refresh()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'path': self.path,
+            'reloads': self.reloads,
+            'snapshot': snapshot.stats() if snapshot is not None else None
+        }
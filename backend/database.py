@@ -1,15 +1,74 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table
+from sqlalchemy import event, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table, Index, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
 import os
+from search_index import create_search_index
+from db_pool import DATABASE_URL, normalize_url, create_app_engine, create_async_app_engine
 
-# Database URL - using SQLite for simplicity
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ecommerce.db"
+# Database URL - SQLite by default, any SQLAlchemy URL via DATABASE_URL (see db_pool.py)
+SQLALCHEMY_DATABASE_URL = normalize_url(DATABASE_URL)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# SQLite performance profile applied to every new connection:
+#   tuned   - WAL journal (readers never block the writer), synchronous=NORMAL
+#             (durable across app crashes, fsync only at checkpoints), memory-mapped
+#             reads, a larger page cache, in-memory temp tables and a busy timeout
+#             so writers queue instead of failing with "database is locked"
+#   default - SQLite's built-in settings (rollback journal, synchronous=FULL)
+# Individual pragmas can be overridden with SQLITE_<PRAGMA>, e.g. SQLITE_CACHE_SIZE=-131072.
+# journal_mode is stored in the database file, so switching back from WAL needs SQLITE_JOURNAL_MODE=DELETE.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_PROFILES = {
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+    "default": {},
+}
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout")
+
+def sqlite_pragmas(profile=None):
+    """Pragmas for ``profile`` (default: SQLITE_PROFILE) with SQLITE_<PRAGMA> overrides applied"""
+    profile = profile or SQLITE_PROFILE
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}' (expected one of: {', '.join(SQLITE_PROFILES)})")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PRAGMAS:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+def apply_sqlite_profile(engine, profile=None):
+    """Run the profile's pragmas on every connection ``engine`` opens (no-op for other databases)"""
+    if engine.dialect.name != "sqlite":
+        return {}
+    pragmas = sqlite_pragmas(profile)
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    
+    return pragmas
+
+engine = create_app_engine(SQLALCHEMY_DATABASE_URL)
+apply_sqlite_profile(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Asyncio engine for the request handlers: same database and pragmas, its own pool.
+# Objects stay usable after commit (no implicit reload, which would need an await).
+async_engine = create_async_app_engine(SQLALCHEMY_DATABASE_URL)
+apply_sqlite_profile(async_engine.sync_engine)
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Association table for wishlist (many-to-many relationship)
@@ -40,8 +99,21 @@ class User(Base):
     reviews = relationship("Review", back_populates="user")
     wishlists = relationship("Product", secondary=wishlist_association, back_populates="wishlisted_by")
 
+# Partial-index predicate for listings, which only ever read active products
+ACTIVE_PRODUCTS = {"sqlite_where": text("is_active = 1"), "postgresql_where": text("is_active")}
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Listing sort modes (product_id is the keyset tie-breaker), then filters under the default sort
+        Index("ix_products_active_popularity", "sales_last_30_days", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_price", "base_price", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_rating", "rating", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_newest", "created_at", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_category", "category", "sales_last_30_days", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_brand_tier", "brand_tier", "sales_last_30_days", "product_id", **ACTIVE_PRODUCTS),
+        Index("ix_products_active_season", "season", "sales_last_30_days", "product_id", **ACTIVE_PRODUCTS),
+    )
     
     product_id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String, nullable=False)
@@ -69,6 +141,10 @@ class Product(Base):
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # One cart line per product; also serves every lookup by user_id
+        Index("uq_cart_items_user_product", "user_id", "product_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -82,6 +158,10 @@ class CartItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -98,6 +178,9 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
@@ -111,6 +194,9 @@ class OrderItem(Base):
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_product_created", "product_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -123,9 +209,32 @@ class Review(Base):
     user = relationship("User", back_populates="reviews")
     product = relationship("Product", back_populates="reviews")
 
+class RevokedToken(Base):
+    """Refresh tokens revoked before their expiry (logout); rows can be purged once expired"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)  # token id claim, uuid4 hex
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+# Schema migrations (Alembic, see migrations/)
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_migrations(revision="head"):
+    """Upgrade the database to ``revision``; databases from before migrations are adopted in place"""
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    run_migrations()
+    create_search_index(engine)
 
 # Dependency to get DB session
 def get_db():
@@ -133,4 +242,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
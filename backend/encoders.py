@@ -0,0 +1,77 @@
+"""Compiled categorical encoders for the prediction paths.
+
+``LabelEncoder.transform`` runs sklearn input validation and a
+``np.searchsorted`` for every call, which dominates the cost of encoding a
+single product. At model load time the fitted encoders are compiled into
+plain dict lookups with a vectorized path for whole columns, and an explicit
+policy decides what happens to categories the model has never seen.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# What to do with a category the encoder was not fitted on:
+#   "error"   - the row cannot be scored (/predict returns 400, listings fall back to target_price)
+#   "default" - encode it as UNSEEN_CATEGORY_CODE and score it anyway
+UNSEEN_POLICIES = ('error', 'default')
+UNSEEN_CATEGORY_POLICY = os.getenv('UNSEEN_CATEGORY_POLICY', 'error')
+UNSEEN_CATEGORY_CODE = int(os.getenv('UNSEEN_CATEGORY_CODE', '-1'))
+
+
+class UnknownCategoryError(ValueError):
+    """Raised when a category is not known to the encoder and the policy is "error" """
+
+    def __init__(self, column, value):
+        super().__init__(f"Unknown {column} '{value}'")
+        self.column = column
+        self.value = value
+
+
+class CompiledEncoder:
+    """Dict-backed replacement for a fitted ``LabelEncoder``"""
+
+    def __init__(self, column, classes, unseen_policy=None, unseen_code=None):
+        unseen_policy = unseen_policy or UNSEEN_CATEGORY_POLICY
+        if unseen_policy not in UNSEEN_POLICIES:
+            raise ValueError(f"Unknown unseen category policy '{unseen_policy}', expected one of {UNSEEN_POLICIES}")
+
+        self.column = column
+        self.classes_ = np.asarray(classes)
+        self.mapping = {value: code for code, value in enumerate(self.classes_.tolist())}
+        self.unseen_policy = unseen_policy
+        self.unseen_code = UNSEEN_CATEGORY_CODE if unseen_code is None else unseen_code
+
+    def __contains__(self, value):
+        return value in self.mapping
+
+    def encode(self, value):
+        """Encode a single category"""
+        code = self.mapping.get(value)
+        if code is not None:
+            return code
+        if self.unseen_policy == 'error':
+            raise UnknownCategoryError(self.column, value)
+        return self.unseen_code
+
+    def encode_array(self, values):
+        """Encode a column of categories.
+
+        Returns ``(codes, known)``: float64 codes and a boolean mask of values
+        that may be scored. Under the "default" policy unseen values get
+        ``unseen_code`` and are still marked usable.
+        """
+        codes = pd.Series(values, dtype=object).map(self.mapping)
+        seen = codes.notna().to_numpy()
+        codes = codes.fillna(self.unseen_code).to_numpy(dtype=np.float64)
+        if self.unseen_policy == 'error':
+            return codes, seen
+        return codes, np.ones(len(codes), dtype=bool)
+
+
+def compile_encoders(label_encoders, unseen_policy=None, unseen_code=None):
+    """Compile fitted ``LabelEncoder`` objects into ``CompiledEncoder`` lookups"""
+    return {
+        column: CompiledEncoder(column, encoder.classes_, unseen_policy, unseen_code)
+        for column, encoder in label_encoders.items()
+    }
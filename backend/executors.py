@@ -0,0 +1,168 @@
+"""Execution layer for CPU-bound work called from async handlers.
+
+Every handler in the API is ``async def``, so anything CPU-heavy that runs
+inline (model training, predictions, CSV parsing, password hashing) stalls the
+event loop and every other in-flight request with it. This module provides a
+thread pool for short CPU work that releases the GIL (NumPy, pandas, bcrypt)
+and a process pool for long-running work such as training, each instrumented
+with saturation metrics.
+
+Password hashing gets a pool of its own: bcrypt is slow by design, and a
+login burst on the shared thread pool would queue predictions and parsing
+behind it. The hashing pool is sized to the cores and its queue is bounded
+(``HASH_QUEUE_LIMIT``); once full, new work is rejected with ``PoolSaturated``
+straight away, so the API can answer 503 instead of letting latency grow
+without limit.
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+CPU_COUNT = os.cpu_count() or 1
+CPU_THREAD_WORKERS = int(os.getenv('CPU_THREAD_WORKERS', str(min(32, CPU_COUNT + 4))))
+CPU_PROCESS_WORKERS = int(os.getenv('CPU_PROCESS_WORKERS', str(max(1, min(4, CPU_COUNT - 1)))))
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(CPU_COUNT)))
+HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', str(HASH_WORKERS * 16)))
+
+
+class PoolSaturated(RuntimeError):
+    """The pool's queue is full; the caller should shed the request"""
+
+
+def _timed_call(fn, *args, **kwargs):
+    """Record when the pool actually started the call (wall clock, valid across processes)"""
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+class InstrumentedPool:
+    """Wraps a ``concurrent.futures`` executor and tracks how saturated it is"""
+
+    def __init__(self, name, executor_factory, max_workers, max_queue=None):
+        self.name = name
+        self.max_workers = max_workers
+        # Calls allowed to wait for a worker; None = unbounded
+        self.max_queue = max_queue
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    @property
+    def executor(self):
+        # Created lazily so importing the app never spawns worker processes
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._executor_factory(self.max_workers)
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        A call counts as in flight until a worker has finished it. Cancelling
+        the awaiting task drops a call that has not started, but one already
+        running keeps its worker busy, so it stays counted until it returns.
+        """
+        submitted_at = time.time()
+        with self._lock:
+            if self.max_queue is not None and self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool queue is full ({self.max_queue} waiting)")
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            future = self.executor.submit(_timed_call, fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(functools.partial(self._record, submitted_at))
+        started_at, result = await asyncio.wrap_future(future)
+        return result
+
+    def _record(self, submitted_at, future):
+        """Done-callback of every submitted call: its worker is free again"""
+        finished_at = time.time()
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            started_at = future.result()[0]
+            self.completed += 1
+            self.total_wait_ms += max(0.0, started_at - submitted_at) * 1000
+            self.total_run_ms += (finished_at - started_at) * 1000
+
+    def stats(self):
+        """Saturation metrics: in-flight work relative to worker count, queue wait and run time"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'in_flight': self.in_flight,
+                'queued': max(0, self.in_flight - self.max_workers),
+                'max_queue': self.max_queue,
+                'saturation': round(self.in_flight / self.max_workers, 3),
+                'peak_in_flight': self.peak_in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'mean_queue_wait_ms': round(self.total_wait_ms / self.completed, 3) if self.completed else 0.0,
+                'mean_run_ms': round(self.total_run_ms / self.completed, 3) if self.completed else 0.0
+            }
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+thread_pool = InstrumentedPool(
+    'thread', lambda workers: ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cpu'), CPU_THREAD_WORKERS
+)
+process_pool = InstrumentedPool(
+    'process', lambda workers: ProcessPoolExecutor(max_workers=workers), CPU_PROCESS_WORKERS
+)
+hash_pool = InstrumentedPool(
+    'hash', lambda workers: ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash'), HASH_WORKERS,
+    max_queue=HASH_QUEUE_LIMIT
+)
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """Run short CPU-bound work (predictions, parsing, hashing) off the event loop"""
+    return await thread_pool.run(fn, *args, **kwargs)
+
+
+async def run_hashing(fn, *args, **kwargs):
+    """Run password hashing on its own bounded pool; raises ``PoolSaturated`` when the queue is full"""
+    return await hash_pool.run(fn, *args, **kwargs)
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Run long CPU-bound work (training) in a worker process; ``fn`` must be picklable"""
+    return await process_pool.run(fn, *args, **kwargs)
+
+
+def pool_stats():
+    """Saturation metrics for every pool"""
+    return {pool.name: pool.stats() for pool in (thread_pool, process_pool, hash_pool)}
+
+
+def shutdown_pools(wait=True):
+    for pool in (thread_pool, process_pool, hash_pool):
+        pool.shutdown(wait=wait)
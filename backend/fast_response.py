@@ -0,0 +1,113 @@
+"""Fast JSON responses: orjson serialization plus negotiated gzip/brotli.
+
+Large listings (``/products``, ``/admin/orders``, ``/admin/users``) normally go
+through FastAPI's ``jsonable_encoder`` and stdlib ``json`` and are sent
+uncompressed. With ``FAST_RESPONSES=1`` those endpoints serialize straight to
+bytes with orjson (falling back to stdlib ``json`` with the same compact
+output when orjson is not installed) and compress the body with the best
+encoding the client accepts: brotli if the ``brotli`` module is installed,
+otherwise gzip. Bodies under ``COMPRESSION_MIN_BYTES`` are sent as they are.
+
+Every fast response carries ``Vary: Accept-Encoding`` so shared caches keep
+one copy per encoding.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FAST_RESPONSES = os.getenv('FAST_RESPONSES', '0') == '1'
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = (['br'] if brotli is not None else []) + ['gzip']
+
+VARY_HEADERS = {'Vary': 'Accept-Encoding'}
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serialize ``content`` to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(',', ':'), default=_default
+    ).encode('utf-8')
+
+
+def parse_accept_encoding(accept_encoding):
+    """``{coding: q}`` from an ``Accept-Encoding`` header"""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    return qualities
+
+
+def negotiate_encoding(accept_encoding, size):
+    """Content coding to use for a body of ``size`` bytes, or None for identity"""
+    if size < COMPRESSION_MIN_BYTES:
+        return None
+    qualities = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = qualities.get(coding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def encoded_response(body, encoding=None, headers=None, status_code=200):
+    """``application/json`` response for an already serialized (and maybe compressed) body"""
+    response_headers = dict(headers or {})
+    response_headers.update(VARY_HEADERS)
+    if encoding is not None:
+        response_headers['Content-Encoding'] = encoding
+    return Response(body, status_code=status_code, headers=response_headers, media_type='application/json')
+
+
+def fast_json_response(request, content, headers=None, status_code=200):
+    """Serialize ``content`` and compress it for the requesting client"""
+    body = dumps(content)
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'), len(body))
+    return encoded_response(compress(body, encoding), encoding, headers, status_code)
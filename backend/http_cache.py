@@ -0,0 +1,59 @@
+"""HTTP conditional GET helpers (ETag / If-None-Match / Cache-Control).
+
+A listing is fully determined by the catalog content, the active model
+version and the query parameters, so its ETag is derived from those alone and
+can be checked before anything is built or serialized. A client or CDN that
+already holds the current representation gets an empty ``304 Not Modified``.
+
+ETags are weak (``W/"..."``): the representation is semantically identical
+across workers and content encodings, which is what caches compare on.
+"""
+import hashlib
+import os
+
+from fastapi import Response
+
+PRODUCTS_CACHE_MAX_AGE = int(os.getenv('PRODUCTS_CACHE_MAX_AGE', '30'))
+
+
+def compute_etag(*parts):
+    """Weak ETag from the values that determine a response"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return f'W/"{digest.hexdigest()}"'
+
+
+def query_key(query_params):
+    """Order-independent representation of a request's query parameters"""
+    return tuple(sorted(query_params.multi_items()))
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an ``If-None-Match`` header against ``etag``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_headers(etag, max_age=None):
+    max_age = PRODUCTS_CACHE_MAX_AGE if max_age is None else max_age
+    return {
+        'ETag': etag,
+        'Cache-Control': f'public, max-age={max_age}, must-revalidate'
+    }
+
+
+def not_modified(headers):
+    """Empty 304 response carrying the validator and caching headers"""
+    return Response(status_code=304, headers=headers)
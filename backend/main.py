@@ -1,7 +1,7 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ValidationError
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -11,13 +11,42 @@ from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import os
 import json
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+import threading
+from typing import Dict, List, Optional
 import io
 import jwt
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from database import get_db, CartItem, Product, User, Order, OrderItem, create_tables
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import engine, async_engine, AsyncSessionLocal, get_async_db, CartItem, Product, User, Order, OrderItem, create_tables
+from db_pool import pool_metrics
+from pricing_engine import FEATURE_COLUMNS, confidence_score, price_recommendation, score_product_inputs, FALLBACK_CONFIDENCE
+from price_table import PriceTable
+from catalog import CatalogStore
+from http_cache import compute_etag, query_key, etag_matches, cache_headers, not_modified
+from fast_response import FAST_RESPONSES, VARY_HEADERS, dumps, negotiate_encoding, compress, encoded_response, fast_json_response
+from pagination import MAX_PAGE_SIZE, PaginationError, sort_mode, page_size, encode_cursor, decode_cursor, sorted_positions, seek_position
+from model_bundle import ModelBundle
+from tree_engine import FlatForest
+from model_registry import (
+    ModelRegistry, ModelVersionNotFound, hash_dataset, feature_metadata,
+    read_metadata_sidecar, write_metadata_sidecar
+)
+from batching import PredictionCoalescer
+from executors import PoolSaturated, run_in_thread, pool_stats, shutdown_pools
+from passwords import pwd_context, hash_password_async, verify_password_async, verify_and_update_async, hashing_busy_exception
+from auth_cache import TokenCache, PrincipalCache, invalidate_on_user_changes
+from refresh_tokens import refresh_claims, is_refresh_token, is_revoked_async, revoke_async, purge_expired_async
+from training_jobs import TrainingJobManager
+
+# Boot timing, measured from app module import to the end of the startup event
+boot_started = time.perf_counter()
+startup_metrics = {}
+# Set by run_production.py once it has migrated the database before forking workers
+schema_ready = False
 
 app = FastAPI(
     title="AI-Powered E-commerce Platform", 
@@ -46,14 +75,27 @@ SECRET_KEY = "your-secret-key-here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # Global variables
-model = None
-label_encoders = {}
-feature_columns = []
-model_metrics = {}
+feature_columns = list(FEATURE_COLUMNS)
+
+# Active model bundle (model, encoders, metrics, version); swapped atomically on retrain
+active_bundle = None
+
+# Versioned model artifacts; each retrain adds a version instead of overwriting the last
+model_registry = ModelRegistry()
+model_swap_lock = threading.Lock()
+
+# How often each worker checks the registry for a version activated by another worker (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '2'))
+model_watch_task = None
+
+# Precomputed prices for the active model version
+price_table = PriceTable()
+
+# Parsed dataset.csv, reloaded only when the file changes
+catalog = CatalogStore()
 
 # Custom product name to image mapping
 product_image_mapping = {
@@ -104,6 +146,11 @@ product_image_mapping = {
 # In-memory user storage (admin only for backward compatibility)
 fake_users_db = {}
 
+# Verified claims keyed by bearer token (until the token expires), and resolved
+# users keyed by token subject, dropped whenever a user row changes
+token_cache = TokenCache(lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+principal_cache = invalidate_on_user_changes(PrincipalCache())
+
 # Pydantic models
 class UserLogin(BaseModel):
     username: str
@@ -132,6 +179,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class ProductInput(BaseModel):
     product_name: str
@@ -170,6 +221,20 @@ class PredictionResponse(BaseModel):
     price_change_percentage: float
     recommendation: str
 
+class BatchPredictionItem(BaseModel):
+    index: int
+    predicted_price: Optional[float] = None
+    confidence_score: Optional[float] = None
+    price_change_percentage: Optional[float] = None
+    recommendation: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    total: int
+    succeeded: int
+    failed: int
+
 class ModelMetrics(BaseModel):
     class Config:
         protected_namespaces = ()
@@ -210,24 +275,42 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+def user_principal(user):
+    """The user dict the endpoints and the principal cache work with"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role,
+        "is_active": user.is_active,
+        "phone": user.phone,
+        "address": user.address,
+        "created_at": user.created_at.isoformat() if user.created_at else None
+    }
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def get_user_by_id(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
-def create_user(db: Session, user_data: UserRegister):
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user_data: UserRegister):
     # Check if email already exists
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         return None
     # Check if username already exists
-    if get_user_by_username(db, user_data.username):
+    if await get_user_by_username(db, user_data.username):
         return None
     
-    hashed_password = get_password_hash(user_data.password)
+    # bcrypt hashing is CPU-bound; it runs on the bounded hashing pool
+    hashed_password = await hash_password_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -239,29 +322,25 @@ def create_user(db: Session, user_data: UserRegister):
         is_active=True
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def authenticate_user(username: str, password: str, db: Session):
-    # Try to authenticate with database users first
-    user = get_user_by_username(db, username)
-    if user and verify_password(password, user.hashed_password):
-        return {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "full_name": user.full_name,
-            "role": user.role,
-            "is_active": user.is_active,
-            "phone": user.phone,
-            "address": user.address,
-            "created_at": user.created_at.isoformat() if user.created_at else None
-        }
+async def authenticate_user(username: str, password: str, db: AsyncSession):
+    # Try to authenticate with database users first; bcrypt verification runs on the hashing pool
+    user = await get_user_by_username(db, username)
+    if user:
+        valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+        if valid:
+            if new_hash:
+                # Hashed with a different BCRYPT_ROUNDS; store it at the current cost
+                user.hashed_password = new_hash
+                await db.commit()
+            return user_principal(user)
     
     # Fallback to fake users for backward compatibility (admin)
     fake_user = fake_users_db.get(username)
-    if fake_user and verify_password(password, fake_user["password"]):
+    if fake_user and await verify_password_async(password, fake_user["password"]):
         return fake_user
     
     return False
@@ -276,7 +355,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def create_refresh_token(username: str, user_id: Optional[int] = None):
+    return jwt.encode(refresh_claims(username, user_id), SECRET_KEY, algorithm=ALGORITHM)
+
+def issue_tokens(user: dict):
+    """Access and refresh token for an authenticated user dict"""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user["username"], "uid": user.get("id"), "role": user["role"]}, expires_delta=access_token_expires
+    )
+    return access_token, create_refresh_token(user["username"], user.get("id"))
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -284,27 +374,26 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     )
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.claims(token)
         username: str = payload.get("sub")
-        if username is None:
+        # Refresh tokens only buy new access tokens at /auth/refresh
+        if username is None or is_refresh_token(payload):
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
+    user_id = payload.get("uid")
     
-    # Try database users first
-    db_user = get_user_by_username(db, username)
-    if db_user:
-        return {
-            "id": db_user.id,
-            "username": db_user.username,
-            "email": db_user.email,
-            "full_name": db_user.full_name,
-            "role": db_user.role,
-            "is_active": db_user.is_active,
-            "phone": db_user.phone,
-            "address": db_user.address,
-            "created_at": db_user.created_at.isoformat() if db_user.created_at else None
-        }
+    # Recently resolved users skip the database; a uid claim must still match
+    principal = principal_cache.get(username)
+    if principal is not None and user_id in (None, principal["id"]):
+        return dict(principal)
+    
+    # Try database users first (tokens carrying the user id look it up by primary key)
+    db_user = await get_user_by_id(db, user_id) if user_id is not None else await get_user_by_username(db, username)
+    if db_user and db_user.username == username:
+        principal = user_principal(db_user)
+        principal_cache.put(username, principal)
+        return dict(principal)
     
     # Fallback to fake users
     fake_user = fake_users_db.get(username)
@@ -336,11 +425,11 @@ def require_admin_role(credentials: HTTPAuthorizationCredentials = Depends(secur
     
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.claims(token)
         username: str = payload.get("sub")
         role: str = payload.get("role")
         
-        if username is None:
+        if username is None or is_refresh_token(payload):
             raise credentials_exception
         
         if role != "admin":
@@ -353,9 +442,7 @@ def require_admin_role(credentials: HTTPAuthorizationCredentials = Depends(secur
 
 # ML model functions
 def load_and_preprocess_data():
-    """Load and preprocess the dataset"""
-    global label_encoders, feature_columns
-    
+    """Load and preprocess the dataset; returns the frame and freshly fitted label encoders"""
     # Load dataset
     df = pd.read_csv('dataset.csv')
     
@@ -368,21 +455,25 @@ def load_and_preprocess_data():
         df[col + '_encoded'] = le.fit_transform(df[col])
         label_encoders[col] = le
     
-    # Define feature columns (excluding target)
-    feature_columns = [
-        'base_price', 'inventory_level', 'competitor_avg_price', 
-        'sales_last_30_days', 'rating', 'review_count', 'material_cost',
-        'category_encoded', 'season_encoded', 'brand_tier_encoded'
-    ]
-    
-    return df
+    return df, label_encoders
 
-def train_model():
-    """Train the ML model"""
-    global model, model_metrics
+def refresh_price_table(bundle, snapshot=None):
+    """Re-score the catalog in bulk for a model bundle"""
+    snapshot = snapshot or catalog.snapshot()
+    price_table.rebuild(
+        bundle.flat_forest, bundle.compiled_encoders, bundle.version, snapshot.frame, row_hashes=snapshot.row_hashes
+    )
+
+def fit_pricing_model():
+    """Fit a new model on dataset.csv without touching the serving state.
+    
+    Returns ``(model, label_encoders, metrics, training_info)``. Safe to run in a
+    worker process.
+    """
+    started = time.perf_counter()
     
     # Load and preprocess data
-    df = load_and_preprocess_data()
+    df, label_encoders = load_and_preprocess_data()
     
     # Prepare features and target
     X = df[feature_columns]
@@ -392,19 +483,19 @@ def train_model():
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # Train model
-    model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
-    model.fit(X_train, y_train)
+    new_model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
+    new_model.fit(X_train, y_train)
     
     # Evaluate model
-    y_pred = model.predict(X_test)
+    y_pred = new_model.predict(X_test)
     mse = mean_squared_error(y_test, y_pred)
     rmse = np.sqrt(mse)
     r2 = r2_score(y_test, y_pred)
     
     # Get feature importance
-    feature_importance = dict(zip(feature_columns, model.feature_importances_))
+    feature_importance = dict(zip(feature_columns, new_model.feature_importances_))
     
-    model_metrics = {
+    metrics = {
         'mse': float(mse),
         'rmse': float(rmse),
         'r2_score': float(r2),
@@ -413,72 +504,242 @@ def train_model():
         'feature_importance': feature_importance
     }
     
-    # Save model and encoders
-    joblib.dump(model, 'pricing_model.pkl')
-    joblib.dump(label_encoders, 'label_encoders.pkl')
-    
     print(f"Model trained successfully!")
     print(f"R² Score: {r2:.4f}")
     print(f"RMSE: ${rmse:.2f}")
     print(f"MSE: {mse:.2f}")
     
-    return model_metrics
+    # Provenance recorded with the version in the model registry
+    training_info = {
+        'row_count': len(df),
+        'dataset_hash': hash_dataset('dataset.csv'),
+        'trained_at': datetime.utcnow().isoformat(),
+        'training_seconds': round(time.perf_counter() - started, 3)
+    }
+    
+    return new_model, label_encoders, metrics, training_info
+
+def activate_model(new_model, new_label_encoders, metrics, training_info=None):
+    """Register a freshly trained model as a new version and atomically make it the active bundle"""
+    global active_bundle
+    
+    # Save model and encoders under a new registry version
+    metadata = model_registry.register(
+        new_model, new_label_encoders, metrics,
+        features=feature_metadata(feature_columns, new_label_encoders), **(training_info or {})
+    )
+    bundle = ModelBundle.build(
+        new_model, new_label_encoders, metrics, metadata['version'],
+        flat_forest=FlatForest.load(model_registry.forest_path(metadata['version']))
+    )
+    model_registry.cache_bundle(bundle)
+    
+    # Precompute prices before the swap so the new version starts with a warm table
+    refresh_price_table(bundle)
+    with model_swap_lock:
+        active_bundle = bundle
+        model_registry.set_active(bundle.version)
+    
+    return bundle
+
+def swap_in_bundle(bundle, warm=True):
+    """Make an already registered bundle active, reusing its price table when still cached.
+    
+    With ``warm=False`` the table starts empty and fills on first lookup, so the
+    swap never scores the catalog (used on the startup path).
+    """
+    global active_bundle
+    
+    if not price_table.activate(bundle.version):
+        if warm and os.path.exists(catalog.path):
+            refresh_price_table(bundle)
+        else:
+            price_table.start_version(bundle.version)
+    active_bundle = bundle
+
+def warm_price_table(bundle):
+    """Score the whole catalog for a bundle in the background after startup"""
+    if active_bundle is bundle and os.path.exists(catalog.path):
+        refresh_price_table(bundle)
+
+def activate_model_version(version):
+    """Activate any registered model version at runtime"""
+    bundle = model_registry.load_bundle(version)
+    with model_swap_lock:
+        swap_in_bundle(bundle)
+        model_registry.set_active(bundle.version)
+    return bundle
+
+def rollback_model():
+    """Reactivate the previously active model version; None if there is nothing to roll back to"""
+    with model_swap_lock:
+        target = model_registry.rollback_target()
+        if target is None:
+            return None
+        bundle = model_registry.load_bundle(target)
+        swap_in_bundle(bundle)
+        model_registry.pop_rollback()
+    return bundle
+
+def train_model():
+    """Train the ML model synchronously and activate it"""
+    return activate_model(*fit_pricing_model()).metrics
+
+# Background training jobs: fit on the process pool, activate with one bundle swap
+training_jobs = TrainingJobManager(fit_pricing_model, activate_model)
+
+def import_legacy_model():
+    """Register the pre-registry pricing_model.pkl/label_encoders.pkl as the first version"""
+    if not (os.path.exists('pricing_model.pkl') and os.path.exists('label_encoders.pkl')):
+        return None
+    
+    loaded_model = joblib.load('pricing_model.pkl')
+    loaded_encoders = joblib.load('label_encoders.pkl')
+    
+    sidecar = read_metadata_sidecar('pricing_model.pkl')
+    if sidecar is not None:
+        metrics = sidecar.get('metrics') or {}
+        training_info = {key: sidecar.get(key) for key in ('row_count', 'dataset_hash', 'trained_at', 'training_seconds')}
+    else:
+        metrics, training_info = score_legacy_model(loaded_model)
+        write_metadata_sidecar('pricing_model.pkl', {
+            'metrics': metrics,
+            'features': feature_metadata(feature_columns, loaded_encoders),
+            **training_info
+        })
+    
+    metadata = model_registry.register(
+        loaded_model, loaded_encoders, metrics, source='import',
+        features=feature_metadata(feature_columns, loaded_encoders), **training_info
+    )
+    model_registry.set_active(metadata['version'])
+    print(f"📦 Imported existing model as registry version {metadata['version']}")
+    return metadata['version']
+
+def score_legacy_model(loaded_model):
+    """Compute metrics for a model that has no metadata sidecar (done once, then persisted)"""
+    metrics = {}
+    training_info = {}
+    if os.path.exists('dataset.csv'):
+        df, _ = load_and_preprocess_data()
+        X = df[feature_columns]
+        y = df['target_price']
+        y_pred = loaded_model.predict(X)
+        
+        mse = mean_squared_error(y, y_pred)
+        rmse = np.sqrt(mse)
+        r2 = r2_score(y, y_pred)
+        
+        metrics = {
+            'mse': float(mse),
+            'rmse': float(rmse),
+            'r2_score': float(r2),
+            'model_type': 'Random Forest Regressor',
+            'training_samples': len(X),
+            'feature_importance': dict(zip(feature_columns, loaded_model.feature_importances_))
+        }
+        training_info = {'row_count': len(df), 'dataset_hash': hash_dataset('dataset.csv')}
+    return metrics, training_info
 
 def load_model():
-    """Load the trained model"""
-    global model, label_encoders, model_metrics
+    """Load the active model version from the registry.
     
-    if os.path.exists('pricing_model.pkl') and os.path.exists('label_encoders.pkl'):
-        model = joblib.load('pricing_model.pkl')
-        label_encoders = joblib.load('label_encoders.pkl')
-        
-        # Load feature columns
-        if os.path.exists('dataset.csv'):
-            df = load_and_preprocess_data()
-            X = df[feature_columns]
-            y = df['target_price']
-            y_pred = model.predict(X)
-            
-            mse = mean_squared_error(y, y_pred)
-            rmse = np.sqrt(mse)
-            r2 = r2_score(y, y_pred)
-            
-            model_metrics = {
-                'mse': float(mse),
-                'rmse': float(rmse),
-                'r2_score': float(r2),
-                'model_type': 'Random Forest Regressor',
-                'training_samples': len(X),
-                'feature_importance': dict(zip(feature_columns, model.feature_importances_))
-            }
-        
+    Constant time in the catalog size: metrics come from the version's
+    metadata and the price table is filled lazily.
+    """
+    version = model_registry.active_version()
+    if version is None:
+        version = import_legacy_model()
+        if version is None:
+            return False
+    
+    with model_swap_lock:
+        swap_in_bundle(model_registry.load_bundle(version), warm=False)
+    return True
+
+def preload_model():
+    """Load the model and warm the price table before forking workers (see run_production.py)"""
+    if load_model():
+        warm_price_table(active_bundle)
         return True
     return False
 
+def sync_active_model():
+    """Follow the registry's active version when another worker activated or rolled back a model"""
+    version = model_registry.active_version()
+    if version is None or (active_bundle is not None and active_bundle.version == version):
+        return None
+    
+    bundle = model_registry.load_bundle(version)
+    with model_swap_lock:
+        if model_registry.active_version() != version:
+            return None
+        swap_in_bundle(bundle)
+    return bundle
+
+async def watch_active_model():
+    """Pick up model versions activated by other worker processes without a restart"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            bundle = await run_in_thread(sync_active_model)
+            if bundle is not None:
+                print(f"🔄 Switched to model version {bundle.version} (activated by another worker)")
+        except Exception as e:
+            print(f"⚠️  Model watch error: {str(e)}")
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize the model and database on startup"""
+    global model_watch_task
     print("\n" + "="*60)
     print("🚀 AI Dynamic Pricing API Starting...")
     print("="*60)
     
     # Create database tables
+    phase_started = time.perf_counter()
     try:
-        create_tables()
-        print("✅ Database tables initialized successfully!")
+        if schema_ready:
+            print("✅ Database schema already migrated by the supervisor")
+        else:
+            create_tables()
+            print("✅ Database tables initialized successfully!")
+        async with AsyncSessionLocal() as db:
+            purged = await purge_expired_async(db)
+        if purged:
+            print(f"🧹 Purged {purged} expired refresh token revocations")
     except Exception as e:
         print(f"⚠️  Database initialization warning: {str(e)}")
+    startup_metrics['database_init_ms'] = round((time.perf_counter() - phase_started) * 1000, 3)
     
     try:
-        if not load_model():
-            print("📚 No existing model found. Training new model...")
-            metrics = train_model()
-            print("✅ Model training completed successfully!")
-            print(f"📊 Model Performance: R² Score = {metrics.get('r2_score', 0):.4f}")
+        phase_started = time.perf_counter()
+        preloaded = active_bundle is not None
+        if preloaded:
+            # Loaded once by the parent before forking; only catch up with newer activations
+            sync_active_model()
+            loaded = True
         else:
-            print("✅ Existing model loaded successfully!")
-            print(f"📊 Model Performance: R² Score = {model_metrics.get('r2_score', 0):.4f}")
+            loaded = load_model()
+        startup_metrics['model_load_ms'] = round((time.perf_counter() - phase_started) * 1000, 3)
+        startup_metrics['preloaded'] = preloaded
+        
+        if not loaded and os.getenv('WORKER_INDEX', '0') != '0':
+            # Multi-worker server: worker 0 trains, this one picks the model up from the registry
+            print("📚 No existing model found. Waiting for worker 0 to train one")
+        elif not loaded:
+            # Never train on the startup path; serve fallback prices until the job finishes
+            job = training_jobs.submit(trigger="startup")
+            print(f"📚 No existing model found. Training job {job.id} started in the background")
+        else:
+            print("✅ Model preloaded by the parent process!" if preloaded else "✅ Existing model loaded successfully!")
+            print(f"📊 Model Performance: R² Score = {active_bundle.metrics.get('r2_score', 0):.4f}")
+            if not preloaded:
+                asyncio.get_running_loop().create_task(run_in_thread(warm_price_table, active_bundle))
+        
+        if MODEL_WATCH_INTERVAL > 0:
+            model_watch_task = asyncio.get_running_loop().create_task(watch_active_model())
         
         print("\n🎯 API Features:")
         print("   • User Authentication & Authorization")
@@ -498,6 +759,18 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Error during startup: {str(e)}")
         print("⚠️  Server will continue but some features may not work properly.")
+    
+    startup_metrics['model_loaded'] = active_bundle is not None
+    startup_metrics['boot_ms'] = round((time.perf_counter() - boot_started) * 1000, 3)
+    print(f"⏱️  Boot completed in {startup_metrics['boot_ms']:.1f} ms")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the model watcher and the CPU worker pools, close the async DB pool"""
+    if model_watch_task is not None:
+        model_watch_task.cancel()
+    shutdown_pools(wait=False)
+    await async_engine.dispose()
 
 # API endpoints
 @app.get("/")
@@ -530,9 +803,9 @@ async def root():
             }
         },
         "model_info": {
-            "status": "loaded" if model is not None else "not_loaded",
+            "status": "loaded" if active_bundle is not None else "not_loaded",
             "type": "Random Forest Regressor",
-            "performance": model_metrics.get('r2_score', 'N/A') if model_metrics else 'N/A'
+            "performance": active_bundle.metrics.get('r2_score', 'N/A') if active_bundle and active_bundle.metrics else 'N/A'
         },
         "documentation": {
             "interactive_docs": "/docs",
@@ -548,9 +821,12 @@ async def root():
 
 # Authentication endpoints
 @app.post("/auth/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
-    user = authenticate_user(user_credentials.username, user_credentials.password, db)
+    try:
+        user = await authenticate_user(user_credentials.username, user_credentials.password, db)
+    except PoolSaturated:
+        raise hashing_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -558,24 +834,77 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    access_token, refresh_token = issue_tokens(user)
+    
+    user_response = UserResponse(**{k: v for k, v in user.items() if k != "password" and k != "hashed_password"})
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user_response,
+        "refresh_token": refresh_token
+    }
+
+async def refresh_token_payload(refresh_token: str, db: AsyncSession):
+    """Claims of a valid, unrevoked refresh token, or 401"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = token_cache.claims(refresh_token)
+    except jwt.PyJWTError:
+        raise credentials_exception
+    if not is_refresh_token(payload) or payload.get("sub") is None or payload.get("jti") is None:
+        raise credentials_exception
+    if await is_revoked_async(db, payload["jti"]):
+        raise credentials_exception
+    return payload
+
+@app.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token, without the password"""
+    payload = await refresh_token_payload(request.refresh_token, db)
+    username, user_id = payload["sub"], payload.get("uid")
+    
+    # Reload the user so a deactivated account or a changed role takes effect here
+    if user_id is not None:
+        db_user = await get_user_by_id(db, user_id)
+        user = user_principal(db_user) if db_user and db_user.username == username else None
+    else:
+        user = fake_users_db.get(username)
+    if not user or not user.get("is_active", True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"], "role": user["role"]}, expires_delta=access_token_expires
+        data={"sub": user["username"], "uid": user.get("id"), "role": user["role"]}, expires_delta=access_token_expires
     )
     
-    user_response = UserResponse(**{k: v for k, v in user.items() if k != "password" and k != "hashed_password"})
-    
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user_response
+        "user": UserResponse(**{k: v for k, v in user.items() if k != "password" and k != "hashed_password"}),
+        "refresh_token": request.refresh_token
     }
 
+@app.post("/auth/logout")
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke a refresh token; access tokens already issued run out on their own"""
+    payload = await refresh_token_payload(request.refresh_token, db)
+    await revoke_async(db, payload)
+    return {"message": "Logged out"}
+
 @app.post("/register", response_model=Token)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if email already exists
-    existing_user_email = get_user_by_email(db, user_data.email)
+    existing_user_email = await get_user_by_email(db, user_data.email)
     if existing_user_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -583,7 +912,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    existing_user_username = get_user_by_username(db, user_data.username)
+    existing_user_username = await get_user_by_username(db, user_data.username)
     if existing_user_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -592,18 +921,15 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     
     # Create new user
     try:
-        new_user = create_user(db, user_data)
+        new_user = await create_user(db, user_data)
         if not new_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to create user"
             )
         
-        # Create access token for the new user
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": new_user.username, "role": new_user.role}, expires_delta=access_token_expires
-        )
+        # Create access and refresh tokens for the new user
+        access_token, refresh_token = issue_tokens(user_principal(new_user))
         
         # Prepare user response
         user_response = UserResponse(
@@ -621,11 +947,14 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         return {
             "access_token": access_token,
             "token_type": "bearer",
-            "user": user_response
+            "user": user_response,
+            "refresh_token": refresh_token
         }
         
+    except PoolSaturated:
+        raise hashing_busy_exception()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
@@ -638,119 +967,172 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 
 # Product endpoints
 @app.get("/products")
-async def get_products():
-    """Get all products with AI pricing"""
+async def get_products(
+    request: Request,
+    response: Response,
+    sort_by: str = Query("popularity", description="popularity, price_low, price_high, rating or newest"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; omit (with no cursor) for the whole catalog"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get all products with AI pricing (supports If-None-Match and cursor pagination)"""
     try:
-        df = pd.read_csv('dataset.csv')
-        products = []
+        # Reloading the snapshot and pricing are CPU-bound; build the listing on the thread pool
+        snapshot = await run_in_thread(catalog.snapshot)
+        bundle = active_bundle
         
-        for index, row in df.iterrows():
-            try:
-                # Get AI prediction for each product
-                prediction = predict_product_price_internal(row)
-                # Get custom image for this product, fallback to sequential mapping
-                image_filename = product_image_mapping.get(row['product_name'], f'{index + 1}.jpg')
-                
-                product = {
-                    'product_id': int(row['product_id']),
-                    'product_name': row['product_name'],
-                    'category': row['category'],
-                    'base_price': float(row['base_price']),
-                    'target_price': float(row['target_price']),
-                    'inventory_level': int(row['inventory_level']),
-                    'rating': float(row['rating']),
-                    'review_count': int(row['review_count']),
-                    'competitor_avg_price': float(row['competitor_avg_price']),
-                    'sales_last_30_days': int(row['sales_last_30_days']),
-                    'season': row['season'],
-                    'brand_tier': row['brand_tier'],
-                    'material_cost': float(row['material_cost']),
-                    'predicted_price': prediction['predicted_price'],
-                    'confidence': prediction['confidence'],
-                    'image_url': f'/assets/{image_filename}'
-                }
-                products.append(product)
-            except Exception as e:
-                # Fallback to original price if prediction fails
-                # Get custom image for this product, fallback to sequential mapping
-                image_filename = product_image_mapping.get(row['product_name'], f'{index + 1}.jpg')
-                
-                product = {
-                    'product_id': int(row['product_id']),
-                    'product_name': row['product_name'],
-                    'category': row['category'],
-                    'base_price': float(row['base_price']),
-                    'target_price': float(row['target_price']),
-                    'inventory_level': int(row['inventory_level']),
-                    'rating': float(row['rating']),
-                    'review_count': int(row['review_count']),
-                    'competitor_avg_price': float(row['competitor_avg_price']),
-                    'sales_last_30_days': int(row['sales_last_30_days']),
-                    'season': row['season'],
-                    'brand_tier': row['brand_tier'],
-                    'material_cost': float(row['material_cost']),
-                    'predicted_price': float(row['target_price']),
-                    'confidence': 0.85,
-                    'image_url': f'/assets/{image_filename}'
-                }
-                products.append(product)
+        # The listing is fully determined by catalog content, model version and query
+        etag = compute_etag(
+            snapshot.content_hash, bundle.version if bundle is not None else None, query_key(request.query_params)
+        )
+        headers = cache_headers(etag)
+        if FAST_RESPONSES:
+            headers.update(VARY_HEADERS)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return not_modified(headers)
+        
+        if limit is not None or cursor is not None:
+            page = await run_in_thread(build_product_page, snapshot, bundle, sort_by, limit, cursor)
+            if FAST_RESPONSES:
+                return fast_json_response(request, page, headers)
+            response.headers.update(headers)
+            return page
+        
+        if FAST_RESPONSES:
+            body, encoding = await run_in_thread(
+                build_product_body, snapshot, bundle, request.headers.get('accept-encoding')
+            )
+            return encoded_response(body, encoding, headers)
         
-        return {"products": products}
+        response.headers.update(headers)
+        return {"products": await run_in_thread(build_product_listing, snapshot, bundle)}
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading products: {str(e)}")
 
-def predict_product_price_internal(row):
-    """Internal function to predict product price from dataset row"""
-    global model, label_encoders
+def build_product_listing(snapshot, bundle):
+    """Product listing from a catalog snapshot priced with a model bundle (or fallbacks if None).
     
-    if model is None:
-        raise Exception("Model not loaded")
+    The listing only changes with the catalog snapshot or the model version,
+    so it is built once per pair and memoized on the snapshot.
+    """
+    model_version = bundle.version if bundle is not None else None
+    return snapshot.memo(('listing', model_version), lambda: price_catalog(snapshot, bundle))
+
+def build_product_body(snapshot, bundle, accept_encoding):
+    """Serialized (and compressed) /products body, memoized per model version and encoding"""
+    model_version = bundle.version if bundle is not None else None
+    body = snapshot.memo(
+        ('body', model_version, None), lambda: dumps({"products": build_product_listing(snapshot, bundle)})
+    )
+    encoding = negotiate_encoding(accept_encoding, len(body))
+    if encoding is None:
+        return body, None
+    return snapshot.memo(('body', model_version, encoding), lambda: compress(body, encoding)), encoding
+
+def build_product_page(snapshot, bundle, sort_by, limit, cursor):
+    """One page of the listing in ``sort_by`` order, starting after ``cursor``.
     
-    try:
-        # Encode categorical features
-        category_encoded = label_encoders['category'].transform([row['category']])[0]
-        season_encoded = label_encoders['season'].transform([row['season']])[0]
-        brand_tier_encoded = label_encoders['brand_tier'].transform([row['brand_tier']])[0]
-        
-        # Prepare feature vector
-        feature_vector = np.array([[
-            row['base_price'],
-            row['inventory_level'],
-            row['competitor_avg_price'],
-            row['sales_last_30_days'],
-            row['rating'],
-            row['review_count'],
-            row['material_cost'],
-            category_encoded,
-            season_encoded,
-            brand_tier_encoded
-        ]])
-        
-        # Make prediction
-        predicted_price = model.predict(feature_vector)[0]
-        
-        # Calculate confidence score based on model performance
-        confidence_score = min(0.95, max(0.6, model_metrics.get('r2_score', 0.8)))
+    The sorted order is computed once per snapshot and sort mode; a cursor is
+    then located with a bisect, so every page costs the same as the first.
+    """
+    sort_field, descending = sort_mode(sort_by)
+    if sort_field == 'relevance':
+        raise PaginationError("sort_by 'relevance' requires a search term")
+    if sort_field == 'created_at':
+        # The catalog file has no creation time; product ids are assigned in insertion order
+        sort_field = 'product_id'
+    columns = snapshot.columns
+    order, keys = snapshot.memo(
+        ('order', sort_field, descending),
+        lambda: sorted_positions(columns[sort_field], columns['product_id'], descending)
+    )
+    
+    start = 0
+    if cursor:
+        start = seek_position(keys, descending, *decode_cursor(cursor, sort_by, sort_field))
+    end = start + page_size(limit or MAX_PAGE_SIZE)
+    listing = build_product_listing(snapshot, bundle)
+    products = [listing[position] for position in order[start:end]]
+    
+    next_cursor = None
+    if end < len(order):
+        last = order[end - 1]
+        next_cursor = encode_cursor(sort_by, columns[sort_field][last], columns['product_id'][last])
+    return {"products": products, "next_cursor": next_cursor}
+
+def price_catalog(snapshot, bundle):
+    """Build listing dicts straight from the snapshot's columns"""
+    # Serve prices from the precomputed table; unscorable rows come back as NaN
+    if bundle is None:
+        predicted_prices = np.full(snapshot.row_count, np.nan)
+        confidence = FALLBACK_CONFIDENCE
+    else:
+        predicted_prices = price_table.lookup(
+            bundle.flat_forest, bundle.compiled_encoders, bundle.version, snapshot.frame, row_hashes=snapshot.row_hashes
+        )
+        confidence = confidence_score(bundle.metrics)
+    
+    columns = snapshot.columns
+    products = []
+    for index in range(snapshot.row_count):
+        predicted_price = predicted_prices[index]
+        if np.isnan(predicted_price):
+            # Fallback to original price if prediction fails
+            product_prediction = {
+                'predicted_price': columns['target_price'][index],
+                'confidence': FALLBACK_CONFIDENCE
+            }
+        else:
+            product_prediction = {
+                'predicted_price': round(float(predicted_price), 2),
+                'confidence': confidence
+            }
         
-        return {
-            'predicted_price': round(float(predicted_price), 2),
-            'confidence': round(float(confidence_score), 3)
+        # Get custom image for this product, fallback to sequential mapping
+        image_filename = product_image_mapping.get(columns['product_name'][index], f'{index + 1}.jpg')
+        
+        product = {
+            'product_id': columns['product_id'][index],
+            'product_name': columns['product_name'][index],
+            'category': columns['category'][index],
+            'base_price': columns['base_price'][index],
+            'target_price': columns['target_price'][index],
+            'inventory_level': columns['inventory_level'][index],
+            'rating': columns['rating'][index],
+            'review_count': columns['review_count'][index],
+            'competitor_avg_price': columns['competitor_avg_price'][index],
+            'sales_last_30_days': columns['sales_last_30_days'][index],
+            'season': columns['season'][index],
+            'brand_tier': columns['brand_tier'][index],
+            'material_cost': columns['material_cost'][index],
+            'predicted_price': product_prediction['predicted_price'],
+            'confidence': product_prediction['confidence'],
+            'image_url': f'/assets/{image_filename}'
         }
-        
-    except Exception as e:
-        raise Exception(f"Prediction error: {str(e)}")
+        products.append(product)
+    
+    return products
+
+def predict_feature_batch(feature_matrix, bundle):
+    """Score a batch of coalesced /predict feature rows with the bundle that encoded them"""
+    return bundle.flat_forest.predict(feature_matrix)
+
+# Coalesces concurrent /predict calls into one vectorized prediction
+prediction_coalescer = PredictionCoalescer(predict_feature_batch, runner=run_in_thread)
 
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_price(product: ProductInput):
     """Predict price for given product features"""
-    if model is None:
+    bundle = active_bundle
+    if bundle is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
         # Encode categorical features
-        category_encoded = label_encoders['category'].transform([product.category])[0]
-        season_encoded = label_encoders['season'].transform([product.season])[0]
-        brand_tier_encoded = label_encoders['brand_tier'].transform([product.brand_tier])[0]
+        category_encoded = bundle.compiled_encoders['category'].encode(product.category)
+        season_encoded = bundle.compiled_encoders['season'].encode(product.season)
+        brand_tier_encoded = bundle.compiled_encoders['brand_tier'].encode(product.brand_tier)
         
         # Prepare feature vector
         feature_vector = np.array([[
@@ -766,22 +1148,17 @@ async def predict_price(product: ProductInput):
             brand_tier_encoded
         ]])
         
-        # Make prediction
-        predicted_price = model.predict(feature_vector)[0]
+        # Make prediction; concurrent requests are scored together in one batch
+        predicted_price = await prediction_coalescer.predict(feature_vector[0], bundle)
         
         # Calculate price change percentage
         price_change = ((predicted_price - product.base_price) / product.base_price) * 100
         
         # Generate recommendation
-        if price_change > 5:
-            recommendation = "Price increase recommended due to market conditions"
-        elif price_change < -5:
-            recommendation = "Price reduction suggested to boost sales"
-        else:
-            recommendation = "Current pricing is optimal"
+        recommendation = price_recommendation(price_change)
         
         # Calculate confidence score based on model performance
-        confidence_score = min(0.95, max(0.6, model_metrics.get('r2_score', 0.8)))
+        confidence_score = min(0.95, max(0.6, bundle.metrics.get('r2_score', 0.8)))
         
         return PredictionResponse(
             predicted_price=round(float(predicted_price), 2),
@@ -793,21 +1170,174 @@ async def predict_price(product: ProductInput):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
 
+# Maximum number of products accepted by /predict/batch in one request
+MAX_BATCH_SIZE = 10000
+
+def parse_batch_payload(body: bytes, content_type: str):
+    """Split a JSON array or NDJSON body into raw records.
+    
+    NDJSON lines that are not valid JSON are returned as error strings so they
+    can be reported per item instead of failing the whole batch.
+    """
+    text = body.decode('utf-8')
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                records.append(f"Invalid JSON: {str(e)}")
+        return records
+    
+    payload = json.loads(text)
+    if not isinstance(payload, list):
+        raise ValueError("Request body must be a JSON array of products")
+    return payload
+
+def predict_batch_records(bundle, raw_records):
+    """Validate, score and serialize parsed batch records with ``bundle``.
+    
+    Validating, scoring and serializing up to MAX_BATCH_SIZE rows takes a second
+    or more of CPU, so all of it runs on the thread pool rather than the event
+    loop. The body is returned already serialized, so FastAPI does not
+    re-validate the response model on the loop either.
+    """
+    # Validate each record independently so bad rows only fail themselves
+    results = [None] * len(raw_records)
+    valid_indices = []
+    valid_records = []
+    for index, raw_record in enumerate(raw_records):
+        if isinstance(raw_record, str):
+            results[index] = {'error': raw_record}
+            continue
+        try:
+            valid_records.append(ProductInput.parse_obj(raw_record).dict())
+            valid_indices.append(index)
+        except ValidationError as e:
+            results[index] = {'error': f"Validation error: {str(e)}"}
+    
+    try:
+        scored = score_product_inputs(bundle.flat_forest, bundle.compiled_encoders, bundle.metrics, valid_records)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
+    for index, result in zip(valid_indices, scored):
+        results[index] = result
+    
+    failed = sum(1 for result in results if 'error' in result)
+    batch = BatchPredictionResponse(
+        results=[BatchPredictionItem(index=index, **result) for index, result in enumerate(results)],
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed
+    )
+    return Response(dumps(batch.dict()), media_type='application/json')
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_price_batch(request: Request):
+    """Predict prices for a JSON array or NDJSON stream of products in one model call"""
+    bundle = active_bundle
+    if bundle is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    body = await request.body()
+    try:
+        raw_records = await run_in_thread(parse_batch_payload, body, request.headers.get('content-type', ''))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch payload: {str(e)}")
+    
+    if len(raw_records) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} products)")
+    
+    return await run_in_thread(predict_batch_records, bundle, raw_records)
+
 @app.get("/metrics", response_model=ModelMetrics)
 async def get_model_metrics():
     """Get current model performance metrics"""
-    if not model_metrics:
+    bundle = active_bundle
+    if bundle is None or not bundle.metrics:
         raise HTTPException(status_code=404, detail="No model metrics available")
-    return ModelMetrics(**model_metrics)
+    return ModelMetrics(**bundle.metrics)
+
+@app.get("/metrics/runtime")
+async def get_runtime_metrics():
+    """Get serving-path runtime metrics (prediction batching, worker pool saturation, DB pool waits)"""
+    return {
+        "startup": startup_metrics,
+        "catalog": catalog.stats(),
+        "prediction_batching": prediction_coalescer.stats(),
+        "price_table": price_table.stats(),
+        "pools": pool_stats(),
+        "database": pool_metrics(engine),
+        "database_async": pool_metrics(async_engine),
+        "token_cache": token_cache.stats(),
+        "principal_cache": principal_cache.stats()
+    }
 
-@app.post("/train")
+@app.post("/train", status_code=status.HTTP_202_ACCEPTED)
 async def retrain_model(admin_user: dict = Depends(require_admin_role)):
-    """Retrain the model (admin only)"""
+    """Start a background retraining job (admin only)"""
+    job = training_jobs.submit(trigger="manual")
+    return {
+        "message": "Model training started",
+        "job": job.to_dict(),
+        "status_url": f"/train/jobs/{job.id}"
+    }
+
+@app.get("/train/jobs")
+async def list_training_jobs(admin_user: dict = Depends(require_admin_role)):
+    """List recent training jobs, newest first (admin only)"""
+    return {"jobs": await run_in_thread(training_jobs.list)}
+
+@app.get("/train/jobs/{job_id}")
+async def get_training_job(job_id: str, admin_user: dict = Depends(require_admin_role)):
+    """Get the status and progress of a training job (admin only)"""
+    job = await run_in_thread(training_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@app.post("/train/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str, admin_user: dict = Depends(require_admin_role)):
+    """Cancel a queued or running training job (admin only)"""
+    job = await training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@app.get("/models")
+async def list_model_versions(admin_user: dict = Depends(require_admin_role)):
+    """List registered model versions with their metadata (admin only)"""
+    versions = await run_in_thread(model_registry.list)
+    return {
+        "active_version": active_bundle.version if active_bundle is not None else None,
+        "rollback_version": model_registry.rollback_target(),
+        "versions": versions
+    }
+
+@app.post("/models/{version}/activate")
+async def activate_model_endpoint(version: int, admin_user: dict = Depends(require_admin_role)):
+    """Activate a registered model version without a restart (admin only)"""
     try:
-        metrics = train_model()
-        return {"message": "Model retrained successfully", "metrics": metrics}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
+        bundle = await run_in_thread(activate_model_version, version)
+    except ModelVersionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": f"Model version {bundle.version} activated", "active_version": bundle.version, "metrics": bundle.metrics}
+
+@app.post("/models/rollback")
+async def rollback_model_endpoint(admin_user: dict = Depends(require_admin_role)):
+    """Roll back to the previously active model version (admin only)"""
+    started = time.perf_counter()
+    bundle = await run_in_thread(rollback_model)
+    if bundle is None:
+        raise HTTPException(status_code=409, detail="No previous model version to roll back to")
+    return {
+        "message": f"Rolled back to model version {bundle.version}",
+        "active_version": bundle.version,
+        "metrics": bundle.metrics,
+        "switch_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
 
 @app.post("/upload-data")
 async def upload_data(file: UploadFile = File(...), admin_user: dict = Depends(require_admin_role)):
@@ -830,7 +1360,7 @@ async def upload_data(file: UploadFile = File(...), admin_user: dict = Depends(r
         
         # Read uploaded CSV file
         contents = await file.read()
-        uploaded_df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        uploaded_df = await run_in_thread(pd.read_csv, io.StringIO(contents.decode('utf-8')))
         
         # Strict column validation
         uploaded_columns = set(uploaded_df.columns.tolist())
@@ -902,9 +1432,9 @@ async def upload_data(file: UploadFile = File(...), admin_user: dict = Depends(r
         
         # Load existing dataset if it exists
         existing_data = None
-        if os.path.exists('dataset.csv'):
+        if os.path.exists(catalog.path):
             try:
-                existing_data = pd.read_csv('dataset.csv')
+                existing_data = (await run_in_thread(catalog.snapshot)).frame
             except Exception as e:
                 print(f"Warning: Could not load existing dataset: {str(e)}")
         
@@ -927,41 +1457,29 @@ async def upload_data(file: UploadFile = File(...), admin_user: dict = Depends(r
         else:
             duplicates_removed = 0
         
-        # Save the combined dataset
-        combined_data.to_csv('dataset.csv', index=False)
+        # Save the combined dataset and publish it as a new catalog snapshot
+        snapshot = await run_in_thread(catalog.replace, combined_data)
         
-        # Automatically trigger model retraining
-        try:
-            print("🔄 Starting automatic model retraining...")
-            retrain_metrics = train_model()
-            print("✅ Model retraining completed successfully!")
-            
-            return {
-                "message": "Data uploaded and model retrained successfully",
-                "upload_stats": {
-                    "new_records": len(uploaded_df),
-                    "total_records": len(combined_data),
-                    "duplicates_removed": duplicates_removed,
-                    "existing_records": len(existing_data) if existing_data is not None else 0
-                },
-                "model_metrics": retrain_metrics,
-                "retraining_status": "completed"
-            }
-            
-        except Exception as retrain_error:
-            # If retraining fails, still return success for data upload
-            print(f"⚠️ Data uploaded successfully but model retraining failed: {str(retrain_error)}")
-            return {
-                "message": "Data uploaded successfully, but model retraining failed",
-                "upload_stats": {
-                    "new_records": len(uploaded_df),
-                    "total_records": len(combined_data),
-                    "duplicates_removed": duplicates_removed,
-                    "existing_records": len(existing_data) if existing_data is not None else 0
-                },
-                "retraining_status": "failed",
-                "retraining_error": str(retrain_error)
-            }
+        # Price the new rows with the current model until the retrained one is active
+        bundle = active_bundle
+        if bundle is not None:
+            await run_in_thread(refresh_price_table, bundle, snapshot)
+        
+        # Automatically trigger model retraining in the background
+        print("🔄 Starting automatic model retraining...")
+        job = training_jobs.submit(trigger="upload")
+        
+        return {
+            "message": "Data uploaded successfully, model retraining started",
+            "upload_stats": {
+                "new_records": len(uploaded_df),
+                "total_records": len(combined_data),
+                "duplicates_removed": duplicates_removed,
+                "existing_records": len(existing_data) if existing_data is not None else 0
+            },
+            "retraining_status": job.status,
+            "training_job_id": job.id
+        }
         
     except HTTPException:
         # Re-raise HTTP exceptions (validation errors)
@@ -974,25 +1492,25 @@ async def upload_data(file: UploadFile = File(...), admin_user: dict = Depends(r
 
 # Cart endpoints
 @app.post("/cart/add")
-async def add_to_cart(cart_item: CartItemAdd, db: Session = Depends(get_db)):
+async def add_to_cart(cart_item: CartItemAdd, db: AsyncSession = Depends(get_async_db)):
     """Add item to cart or update quantity if item already exists"""
     try:
         # Check if the product exists
-        product = db.query(Product).filter(Product.product_id == cart_item.product_id).first()
+        product = await db.get(Product, cart_item.product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
         # Check if item already exists in cart for this user
-        existing_item = db.query(CartItem).filter(
+        cart_line = select(CartItem).where(
             CartItem.user_id == cart_item.user_id,
             CartItem.product_id == cart_item.product_id
-        ).first()
+        )
+        existing_item = (await db.execute(cart_line)).scalars().first()
         
         if existing_item:
             # Update existing item quantity
             existing_item.quantity += cart_item.quantity
-            db.commit()
-            db.refresh(existing_item)
+            await db.commit()
             return {"message": "Cart item quantity updated", "cart_item_id": existing_item.id, "new_quantity": existing_item.quantity}
         else:
             # Create new cart item
@@ -1002,22 +1520,32 @@ async def add_to_cart(cart_item: CartItemAdd, db: Session = Depends(get_db)):
                 quantity=cart_item.quantity
             )
             db.add(new_cart_item)
-            db.commit()
-            db.refresh(new_cart_item)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # A concurrent request added the same product first (one cart line per user and product)
+                await db.rollback()
+                existing_item = (await db.execute(cart_line)).scalars().first()
+                existing_item.quantity += cart_item.quantity
+                await db.commit()
+                return {"message": "Cart item quantity updated", "cart_item_id": existing_item.id, "new_quantity": existing_item.quantity}
             return {"message": "Item added to cart", "cart_item_id": new_cart_item.id}
             
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error adding item to cart: {str(e)}")
 
 @app.get("/cart")
-async def get_cart(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_cart(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get cart items for the current authenticated user with product details"""
     try:
         # Query cart items with product details using JOIN
-        cart_items = db.query(CartItem).join(Product).filter(
-            CartItem.user_id == current_user["id"]
-        ).all()
+        result = await db.execute(
+            select(CartItem, Product)
+            .join(Product, CartItem.product_id == Product.product_id)
+            .where(CartItem.user_id == current_user["id"])
+        )
+        cart_items = result.all()
         
         if not cart_items:
             return {"items": [], "total_amount": 0}
@@ -1026,8 +1554,7 @@ async def get_cart(current_user: dict = Depends(get_current_user), db: Session =
         items = []
         total_amount = 0
         
-        for cart_item in cart_items:
-            product = cart_item.product
+        for cart_item, product in cart_items:
             item_total = product.target_price * cart_item.quantity
             total_amount += item_total
             
@@ -1060,24 +1587,23 @@ async def get_cart(current_user: dict = Depends(get_current_user), db: Session =
         raise HTTPException(status_code=500, detail=f"Error retrieving cart: {str(e)}")
 
 @app.put("/cart/item/{item_id}")
-async def update_cart_item_quantity(item_id: int, cart_update: CartItemUpdate, db: Session = Depends(get_db)):
+async def update_cart_item_quantity(item_id: int, cart_update: CartItemUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update cart item quantity or delete if quantity <= 0"""
     try:
         # Find the cart item
-        cart_item = db.query(CartItem).filter(CartItem.id == item_id).first()
+        cart_item = await db.get(CartItem, item_id)
         if not cart_item:
             raise HTTPException(status_code=404, detail="Cart item not found")
         
         # If quantity is 0 or less, delete the item
         if cart_update.quantity <= 0:
-            db.delete(cart_item)
-            db.commit()
+            await db.delete(cart_item)
+            await db.commit()
             return {"message": "Item removed from cart"}
         
         # Otherwise, update the quantity
         cart_item.quantity = cart_update.quantity
-        db.commit()
-        db.refresh(cart_item)
+        await db.commit()
         
         return {
             "message": "Cart item quantity updated",
@@ -1086,60 +1612,58 @@ async def update_cart_item_quantity(item_id: int, cart_update: CartItemUpdate, d
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating cart item: {str(e)}")
 
 @app.delete("/cart/clear")
-async def clear_cart(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def clear_cart(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Clear all items from user's cart"""
     try:
-        # Delete all cart items for the current user
-        cart_items = db.query(CartItem).filter(CartItem.user_id == current_user["id"]).all()
-        
-        for item in cart_items:
-            db.delete(item)
-        
-        db.commit()
+        # Delete all cart items for the current user in one statement
+        await db.execute(delete(CartItem).where(CartItem.user_id == current_user["id"]))
+        await db.commit()
         return {"message": "Cart cleared successfully"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error clearing cart: {str(e)}")
 
 @app.delete("/cart/{item_id}")
-async def remove_cart_item(item_id: int, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def remove_cart_item(item_id: int, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Remove specific item from cart"""
     try:
         # Find the cart item
-        cart_item = db.query(CartItem).filter(
+        result = await db.execute(select(CartItem).where(
             CartItem.id == item_id,
             CartItem.user_id == current_user["id"]
-        ).first()
+        ))
+        cart_item = result.scalars().first()
         
         if not cart_item:
             raise HTTPException(status_code=404, detail="Cart item not found")
         
-        db.delete(cart_item)
-        db.commit()
+        await db.delete(cart_item)
+        await db.commit()
         
         return {"message": "Item removed from cart"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error removing cart item: {str(e)}")
 
 # Order endpoints
 @app.post("/orders/create", response_model=OrderResponse)
-async def create_order(order_data: OrderCreate, current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_order(order_data: OrderCreate, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Create a new order from user's cart items"""
     try:
-        # Start a transaction
-        db.begin()
-        
+        # The session opens the transaction on its first statement
         # 1. Fetch all items for the user from the cart_items table
-        cart_items = db.query(CartItem).join(Product).filter(
-            CartItem.user_id == current_user["id"]
-        ).all()
+        result = await db.execute(
+            select(CartItem, Product)
+            .join(Product, CartItem.product_id == Product.product_id)
+            .where(CartItem.user_id == current_user["id"])
+        )
+        cart_items = result.all()
         
         if not cart_items:
             raise HTTPException(status_code=400, detail="Cart is empty")
@@ -1148,8 +1672,7 @@ async def create_order(order_data: OrderCreate, current_user: dict = Depends(get
         total_amount = 0
         order_items_data = []
         
-        for cart_item in cart_items:
-            product = cart_item.product
+        for cart_item, product in cart_items:
             # Use predicted price if available, fallback to target price
             price_at_time = product.target_price  # In real scenario, this would include AI prediction
             item_total = price_at_time * cart_item.quantity
@@ -1163,7 +1686,6 @@ async def create_order(order_data: OrderCreate, current_user: dict = Depends(get
             })
         
         # 3. Create a new record in the orders table
-        import json
         new_order = Order(
             user_id=current_user["id"],
             total_amount=total_amount,
@@ -1173,7 +1695,7 @@ async def create_order(order_data: OrderCreate, current_user: dict = Depends(get
         )
         
         db.add(new_order)
-        db.flush()  # This assigns the ID but doesn't commit yet
+        await db.flush()  # This assigns the ID but doesn't commit yet
         
         # 4. For each item from the cart, create a corresponding record in the order_items table
         db_order_items = []
@@ -1188,16 +1710,13 @@ async def create_order(order_data: OrderCreate, current_user: dict = Depends(get
             db_order_items.append(order_item)
         
         # 5. Delete all items from the user's cart_items table to clear their cart
-        for cart_item in cart_items:
-            db.delete(cart_item)
+        await db.execute(delete(CartItem).where(CartItem.user_id == current_user["id"]))
         
         # Commit the transaction
-        db.commit()
+        await db.commit()
         
-        # Refresh to get the complete data
-        db.refresh(new_order)
-        for item in db_order_items:
-            db.refresh(item)
+        # Reload the order for its server-side created_at
+        await db.refresh(new_order)
         
         # Prepare response with order items
         order_items_response = []
@@ -1227,32 +1746,36 @@ async def create_order(order_data: OrderCreate, current_user: dict = Depends(get
         )
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating order: {str(e)}")
 
 @app.get("/orders")
-async def get_user_orders(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_orders(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get all orders for the current user"""
     try:
-        orders = db.query(Order).filter(Order.user_id == current_user["id"]).all()
+        orders = (await db.execute(select(Order).where(Order.user_id == current_user["id"]))).scalars().all()
+        
+        # Items of every order in one query instead of one per order
+        items_by_order = {order.id: [] for order in orders}
+        if orders:
+            result = await db.execute(
+                select(OrderItem.order_id, Product.product_name, OrderItem.quantity, OrderItem.price_at_time)
+                .join(Product, OrderItem.product_id == Product.product_id)
+                .where(OrderItem.order_id.in_(list(items_by_order)))
+                .order_by(OrderItem.id)
+            )
+            for order_id, product_name, quantity, price_at_time in result:
+                items_by_order[order_id].append({
+                    "product_name": product_name,
+                    "quantity": quantity,
+                    "price": price_at_time
+                })
         
         orders_response = []
         for order in orders:
-            # Get order items
-            order_items = db.query(OrderItem).join(Product).filter(OrderItem.order_id == order.id).all()
-            
-            items_data = []
-            for item in order_items:
-                items_data.append({
-                    "product_name": item.product.product_name,
-                    "quantity": item.quantity,
-                    "price": item.price_at_time
-                })
-            
-            import json
             shipping_address = json.loads(order.shipping_address) if order.shipping_address else {}
             
             orders_response.append({
@@ -1261,7 +1784,7 @@ async def get_user_orders(current_user: dict = Depends(get_current_user), db: Se
                 "total": order.total_amount,
                 "status": order.status,
                 "created_at": order.created_at.isoformat(),
-                "items": items_data,
+                "items": items_by_order[order.id],
                 "shipping_address": shipping_address
             })
         
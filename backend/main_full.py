@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_, desc, func
 from datetime import timedelta
 import pandas as pd
 import numpy as np
@@ -12,22 +13,33 @@ from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import os
 import json
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Any, List, Optional
 import io
 
 # Import our new modules
-from database import get_db, create_tables, User, Product, CartItem, Order, OrderItem, Review
+from database import engine, get_db, create_tables, User, Product, CartItem, Order, OrderItem, Review
 from auth import (
-    authenticate_user, create_access_token, get_current_active_user, 
-    get_admin_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+    authenticate_user_async, create_access_token, create_refresh_token, decode_refresh_token,
+    get_current_active_user, get_admin_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from schemas import (
-    UserCreate, UserLogin, UserResponse, UserUpdate, Token,
-    ProductCreate, ProductUpdate, ProductResponse, ProductFilter,
+    UserCreate, UserLogin, UserResponse, UserUpdate, Token, RefreshRequest,
+    ProductCreate, ProductUpdate, ProductResponse, ProductFilter, ProductPage,
     CartItemCreate, CartItemUpdate, CartResponse, CartItemResponse,
     OrderCreate, OrderResponse, ReviewCreate, ReviewResponse,
     DashboardStats, ProductInput, PredictionResponse, ModelMetrics
 )
+from pricing_engine import FEATURE_COLUMNS, products_to_frame, confidence_score, FALLBACK_CONFIDENCE
+from price_table import PriceTable
+from model_bundle import ModelBundle
+from model_registry import feature_metadata, read_metadata_sidecar, write_metadata_sidecar
+from executors import PoolSaturated, run_in_thread
+from passwords import hash_password_async, hashing_busy_exception
+from search_index import fts_available, search_products
+from fast_response import FAST_RESPONSES, fast_json_response
+from refresh_tokens import revoke, purge_expired
+from pagination import DEFAULT_SORT, PaginationError, sort_mode, page_size, encode_cursor, decode_cursor, keyset_column, order_query, seek_query
 
 app = FastAPI(
     title="AI-Powered E-commerce Platform",
@@ -44,11 +56,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for ML model
-model = None
-label_encoders = {}
-feature_columns = []
-model_metrics = {}
+# The serving model: estimator, encoders, metrics and version published together,
+# so a retrain finishing mid-request swaps them in a single assignment
+active_bundle = None
+
+# Precomputed prices for the active model version
+price_table = PriceTable()
 
 # Create database tables
 create_tables()
@@ -58,9 +71,9 @@ create_tables()
 async def startup_event():
     """Initialize the model and create admin user on startup"""
     if not load_model():
-        print("Training new model...")
-        train_model()
-        print("Model ready!")
+        # Train in the background; listings fall back to target prices until it finishes
+        print("Training new model in the background...")
+        asyncio.get_running_loop().create_task(run_in_thread(train_model))
     
     # Create default admin user if not exists
     db = next(get_db())
@@ -77,6 +90,7 @@ async def startup_event():
         db.commit()
         print("Default admin user created: username=admin, password=admin123")
     
+    purge_expired(db)
     db.close()
 
 # =================================
@@ -92,36 +106,44 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     if db.query(User).filter(User.username == user.username).first():
         raise HTTPException(status_code=400, detail="Username already taken")
     
-    # Create new user
+    # Create new user; bcrypt runs on the bounded hashing pool
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except PoolSaturated:
+        raise hashing_busy_exception()
     db_user = User(
         email=user.email,
         username=user.username,
         full_name=user.full_name,
         phone=user.phone,
         address=user.address,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=hashed_password,
         role="user"
     )
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     
-    # Create access token
+    # Create access and refresh tokens
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
+        data={"sub": db_user.username, "uid": db_user.id, "role": db_user.role}, expires_delta=access_token_expires
     )
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": db_user
+        "user": db_user,
+        "refresh_token": create_refresh_token(db_user.username, db_user.id)
     }
 
 @app.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Login user and return access token"""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    try:
+        user = await authenticate_user_async(db, user_credentials.username, user_credentials.password)
+    except PoolSaturated:
+        raise hashing_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -131,15 +153,47 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id, "role": user.role}, expires_delta=access_token_expires
+    )
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user,
+        "refresh_token": create_refresh_token(user.username, user.id)
+    }
+
+@app.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token, without the password"""
+    payload = decode_refresh_token(db, request.refresh_token)
+    # Reload the user so a deactivated account or a changed role takes effect here
+    user = db.get(User, payload.get("uid")) if payload.get("uid") is not None else None
+    if user is None or user.username != payload["sub"] or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username, "uid": user.id, "role": user.role}, expires_delta=access_token_expires
     )
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user
+        "user": user,
+        "refresh_token": request.refresh_token
     }
 
+@app.post("/auth/logout")
+async def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Revoke a refresh token; access tokens already issued run out on their own"""
+    revoke(db, decode_refresh_token(db, request.refresh_token))
+    return {"message": "Logged out"}
+
 @app.get("/auth/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """Get current user information"""
@@ -163,12 +217,13 @@ async def update_profile(
 # PRODUCT ENDPOINTS
 # =================================
 
-@app.get("/products", response_model=Dict[str, List[ProductResponse]])
+@app.get("/products", response_model=ProductPage)
 async def get_products(
+    request: Request,
     filters: ProductFilter = Depends(),
     db: Session = Depends(get_db)
 ):
-    """Get products with filtering, searching, and pagination"""
+    """Get products with filtering, searching, and cursor pagination"""
     query = db.query(Product).filter(Product.is_active == True)
     
     # Apply filters
@@ -184,47 +239,73 @@ async def get_products(
         query = query.filter(Product.base_price <= filters.max_price)
     if filters.min_rating:
         query = query.filter(Product.rating >= filters.min_rating)
+    search_rank = None
     if filters.search:
-        search_term = f"%{filters.search}%"
-        query = query.filter(
-            or_(
-                Product.product_name.ilike(search_term),
-                Product.category.ilike(search_term)
+        # Full-text index with BM25 ranking; ILIKE only where FTS5 is unavailable
+        if fts_available(engine):
+            query, search_rank = search_products(query, Product.product_id, filters.search)
+        if search_rank is None:
+            search_term = f"%{filters.search}%"
+            query = query.filter(
+                or_(
+                    Product.product_name.ilike(search_term),
+                    Product.category.ilike(search_term),
+                    Product.description.ilike(search_term)
+                )
             )
-        )
     
-    # Apply sorting
-    if filters.sort_by == "price_low":
-        query = query.order_by(asc(Product.base_price))
-    elif filters.sort_by == "price_high":
-        query = query.order_by(desc(Product.base_price))
-    elif filters.sort_by == "rating":
-        query = query.order_by(desc(Product.rating))
-    elif filters.sort_by == "newest":
-        query = query.order_by(desc(Product.created_at))
-    else:  # popularity
-        query = query.order_by(desc(Product.sales_last_30_days))
-    
-    # Pagination
-    offset = (filters.page - 1) * filters.limit
-    products = query.offset(offset).limit(filters.limit).all()
-    
-    # Add AI predictions
+    # Apply sorting, with product_id as the tie-breaker so the order is stable
+    sort_by = filters.sort_by or ("relevance" if search_rank is not None else DEFAULT_SORT)
+    if sort_by == "relevance" and search_rank is None:
+        sort_by = DEFAULT_SORT
+    try:
+        sort_field, descending = sort_mode(sort_by)
+        if sort_field == "relevance":
+            sort_column = search_rank
+        else:
+            # Sort values as stored, so a cursor matches its own row exactly (see pagination)
+            sort_column = keyset_column(getattr(Product, sort_field))
+        query = query.add_columns(sort_column)
+        query = order_query(query, sort_column, Product.product_id, descending)
+        
+        # Pagination: seek past the cursor instead of skipping rows with OFFSET
+        limit = page_size(filters.limit)
+        if filters.cursor:
+            value, last_product_id = decode_cursor(filters.cursor, sort_by)
+            query = seek_query(query, sort_column, Product.product_id, descending, value, last_product_id)
+        elif filters.page and filters.page > 1:
+            query = query.offset((filters.page - 1) * limit)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    products, sort_values = [row[0] for row in rows], [row[1] for row in rows]
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor(sort_by, sort_values[limit - 1], products[-1].product_id)
+    
+    # Add AI predictions for the whole page from the price table
+    bundle = active_bundle
+    predicted_prices = get_product_prices(products, bundle)
+    confidence = confidence_score(bundle.metrics) if bundle is not None else FALLBACK_CONFIDENCE
+    
     products_with_predictions = []
-    for product in products:
-        try:
-            # Get AI prediction
-            prediction = predict_product_price(product)
-            product_dict = ProductResponse.from_orm(product).dict()
-            product_dict.update(prediction)
-            products_with_predictions.append(ProductResponse(**product_dict))
-        except:
-            product_dict = ProductResponse.from_orm(product).dict()
+    for product, predicted_price in zip(products, predicted_prices):
+        product_dict = ProductResponse.from_orm(product).dict()
+        if np.isnan(predicted_price):
             product_dict['predicted_price'] = product.target_price
-            product_dict['confidence'] = 0.85
-            products_with_predictions.append(ProductResponse(**product_dict))
+            product_dict['confidence'] = FALLBACK_CONFIDENCE
+        else:
+            product_dict['predicted_price'] = round(float(predicted_price), 2)
+            product_dict['confidence'] = confidence
+        products_with_predictions.append(product_dict)
     
-    return {"products": products_with_predictions}
+    page = {"products": products_with_predictions, "next_cursor": next_cursor}
+    if FAST_RESPONSES:
+        return fast_json_response(request, page)
+    return page
 
 @app.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: int, db: Session = Depends(get_db)):
@@ -358,7 +439,16 @@ async def add_to_cart(
             quantity=item.quantity
         )
         db.add(cart_item)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request added the same product first (one cart line per user and product)
+            db.rollback()
+            cart_item = db.query(CartItem).filter(
+                and_(CartItem.user_id == current_user.id, CartItem.product_id == item.product_id)
+            ).first()
+            cart_item.quantity += item.quantity
+            db.commit()
         db.refresh(cart_item)
         return cart_item
 
@@ -531,18 +621,21 @@ async def get_wishlist(
     db: Session = Depends(get_db)
 ):
     """Get user's wishlist"""
+    products = list(current_user.wishlists)
+    bundle = active_bundle
+    predicted_prices = get_product_prices(products, bundle)
+    confidence = confidence_score(bundle.metrics) if bundle is not None else FALLBACK_CONFIDENCE
+    
     products_with_predictions = []
-    for product in current_user.wishlists:
-        try:
-            prediction = predict_product_price(product)
-            product_dict = ProductResponse.from_orm(product).dict()
-            product_dict.update(prediction)
-            products_with_predictions.append(ProductResponse(**product_dict))
-        except:
-            product_dict = ProductResponse.from_orm(product).dict()
+    for product, predicted_price in zip(products, predicted_prices):
+        product_dict = ProductResponse.from_orm(product).dict()
+        if np.isnan(predicted_price):
             product_dict['predicted_price'] = product.target_price
-            product_dict['confidence'] = 0.85
-            products_with_predictions.append(ProductResponse(**product_dict))
+            product_dict['confidence'] = FALLBACK_CONFIDENCE
+        else:
+            product_dict['predicted_price'] = round(float(predicted_price), 2)
+            product_dict['confidence'] = confidence
+        products_with_predictions.append(ProductResponse(**product_dict))
     
     return products_with_predictions
 
@@ -618,78 +711,67 @@ async def get_dashboard_stats(
 
 @app.get("/admin/users", response_model=List[UserResponse])
 async def get_all_users(
+    request: Request,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all users (admin only)"""
     users = db.query(User).all()
+    if FAST_RESPONSES:
+        return fast_json_response(request, [UserResponse.from_orm(user).dict() for user in users])
     return users
 
 @app.get("/admin/orders", response_model=List[OrderResponse])
 async def get_all_orders(
+    request: Request,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all orders (admin only)"""
     orders = db.query(Order).order_by(desc(Order.created_at)).all()
+    if FAST_RESPONSES:
+        return fast_json_response(request, [OrderResponse.from_orm(order).dict() for order in orders])
     return orders
 
 # =================================
 # ML MODEL ENDPOINTS (keeping existing functionality)
 # =================================
 
+def get_product_prices(products, bundle):
+    """Predicted prices for ORM products with ``bundle``, served from the price table (NaN if unscorable)"""
+    if bundle is None:
+        return np.full(len(products), np.nan)
+    return price_table.lookup(
+        bundle.flat_forest, bundle.compiled_encoders, bundle.version, products_to_frame(products)
+    )
+
 def predict_product_price(product):
     """Helper function to predict product price"""
-    global model, label_encoders
-    
-    if model is None:
+    bundle = active_bundle
+    if bundle is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
-    try:
-        # Encode categorical features
-        category_encoded = label_encoders['category'].transform([product.category])[0]
-        season_encoded = label_encoders['season'].transform([product.season])[0]
-        brand_tier_encoded = label_encoders['brand_tier'].transform([product.brand_tier])[0]
-        
-        # Prepare feature vector
-        feature_vector = np.array([[
-            product.base_price,
-            product.inventory_level,
-            product.competitor_avg_price,
-            product.sales_last_30_days,
-            product.rating,
-            product.review_count,
-            product.material_cost,
-            category_encoded,
-            season_encoded,
-            brand_tier_encoded
-        ]])
-        
-        # Make prediction
-        predicted_price = model.predict(feature_vector)[0]
-        
-        # Calculate confidence score based on model performance
-        confidence_score = min(0.95, max(0.6, model_metrics.get('r2_score', 0.8)))
-        
-        return {
-            'predicted_price': round(float(predicted_price), 2),
-            'confidence': round(float(confidence_score), 3)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
+    predicted_price = get_product_prices([product], bundle)[0]
+    if np.isnan(predicted_price):
+        raise HTTPException(status_code=400, detail="Prediction error: product features could not be encoded")
+    
+    return {
+        'predicted_price': round(float(predicted_price), 2),
+        'confidence': confidence_score(bundle.metrics)
+    }
 
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_price(product: ProductInput):
     """Predict price for given product features"""
-    if model is None:
+    bundle = active_bundle
+    if bundle is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
         # Encode categorical features
-        category_encoded = label_encoders['category'].transform([product.category])[0]
-        season_encoded = label_encoders['season'].transform([product.season])[0]
-        brand_tier_encoded = label_encoders['brand_tier'].transform([product.brand_tier])[0]
+        category_encoded = bundle.compiled_encoders['category'].encode(product.category)
+        season_encoded = bundle.compiled_encoders['season'].encode(product.season)
+        brand_tier_encoded = bundle.compiled_encoders['brand_tier'].encode(product.brand_tier)
         
         # Prepare feature vector
         feature_vector = np.array([[
@@ -705,8 +787,8 @@ async def predict_price(product: ProductInput):
             brand_tier_encoded
         ]])
         
-        # Make prediction
-        predicted_price = model.predict(feature_vector)[0]
+        # Make prediction with the flat-array engine (identical to model.predict)
+        predicted_price = bundle.flat_forest.predict(feature_vector)[0]
         
         # Calculate price change percentage
         price_change = ((predicted_price - product.base_price) / product.base_price) * 100
@@ -720,7 +802,7 @@ async def predict_price(product: ProductInput):
             recommendation = "Current pricing is optimal"
         
         # Calculate confidence score based on model performance
-        confidence_score = min(0.95, max(0.6, model_metrics.get('r2_score', 0.8)))
+        confidence_score = min(0.95, max(0.6, bundle.metrics.get('r2_score', 0.8)))
         
         return PredictionResponse(
             predicted_price=round(float(predicted_price), 2),
@@ -735,9 +817,10 @@ async def predict_price(product: ProductInput):
 @app.get("/metrics", response_model=ModelMetrics)
 async def get_model_metrics():
     """Get current model performance metrics"""
-    if not model_metrics:
+    bundle = active_bundle
+    if bundle is None or not bundle.metrics:
         raise HTTPException(status_code=404, detail="No model metrics available")
-    return ModelMetrics(**model_metrics)
+    return ModelMetrics(**bundle.metrics)
 
 @app.post("/train")
 async def retrain_model(current_user: User = Depends(get_admin_user)):
@@ -776,9 +859,7 @@ async def retrain_model(current_user: User = Depends(get_admin_user)):
 
 # ML model functions (keeping existing implementation)
 def load_and_preprocess_data():
-    """Load and preprocess the dataset"""
-    global label_encoders, feature_columns
-    
+    """Load and preprocess the dataset; returns the frame and freshly fitted label encoders"""
     # Load dataset
     df = pd.read_csv('dataset.csv')
     
@@ -791,24 +872,25 @@ def load_and_preprocess_data():
         df[col + '_encoded'] = le.fit_transform(df[col])
         label_encoders[col] = le
     
-    # Define feature columns (excluding target)
-    feature_columns = [
-        'base_price', 'inventory_level', 'competitor_avg_price', 
-        'sales_last_30_days', 'rating', 'review_count', 'material_cost',
-        'category_encoded', 'season_encoded', 'brand_tier_encoded'
-    ]
-    
-    return df
+    return df, label_encoders
+
+def next_model_version():
+    bundle = active_bundle
+    return bundle.version + 1 if bundle is not None else 1
 
 def train_model():
-    """Train the ML model"""
-    global model, model_metrics
+    """Train the ML model.
+    
+    Everything is fitted into locals and published as one ``ModelBundle`` at the
+    end, so requests served while training keep using the previous model.
+    """
+    global active_bundle
     
     # Load and preprocess data
-    df = load_and_preprocess_data()
+    df, label_encoders = load_and_preprocess_data()
     
     # Prepare features and target
-    X = df[feature_columns]
+    X = df[FEATURE_COLUMNS]
     y = df['target_price']
     
     # Split data
@@ -825,7 +907,7 @@ def train_model():
     r2 = r2_score(y_test, y_pred)
     
     # Get feature importance
-    feature_importance = dict(zip(feature_columns, model.feature_importances_))
+    feature_importance = dict(zip(FEATURE_COLUMNS, model.feature_importances_))
     
     model_metrics = {
         'mse': float(mse),
@@ -836,9 +918,19 @@ def train_model():
         'feature_importance': feature_importance
     }
     
-    # Save model and encoders
+    # Save model and encoders, with metrics next to them so load_model never re-scores
     joblib.dump(model, 'pricing_model.pkl')
     joblib.dump(label_encoders, 'label_encoders.pkl')
+    write_metadata_sidecar('pricing_model.pkl', {
+        'metrics': model_metrics,
+        'features': feature_metadata(FEATURE_COLUMNS, label_encoders),
+        'row_count': len(df)
+    })
+    
+    # New model version: precompute prices for the whole catalog, then publish it
+    bundle = ModelBundle.build(model, label_encoders, model_metrics, next_model_version())
+    price_table.rebuild(bundle.flat_forest, bundle.compiled_encoders, bundle.version, df)
+    active_bundle = bundle
     
     print(f"Model trained successfully!")
     print(f"R² Score: {r2:.4f}")
@@ -849,24 +941,20 @@ def train_model():
 
 def load_model():
     """Load the trained model"""
-    global model, label_encoders, model_metrics
+    global active_bundle
     
     if os.path.exists('pricing_model.pkl') and os.path.exists('label_encoders.pkl'):
         model = joblib.load('pricing_model.pkl')
         label_encoders = joblib.load('label_encoders.pkl')
+        model_metrics = {}
         
-        # Load feature columns
-        if os.path.exists('dataset.csv'):
-            df = pd.read_csv('dataset.csv')
-            feature_columns = [
-                'base_price', 'inventory_level', 'competitor_avg_price', 
-                'sales_last_30_days', 'rating', 'review_count', 'material_cost',
-                'category_encoded', 'season_encoded', 'brand_tier_encoded'
-            ]
-            
-            # Calculate metrics on existing data
-            df = load_and_preprocess_data()
-            X = df[feature_columns]
+        sidecar = read_metadata_sidecar('pricing_model.pkl')
+        if sidecar is not None:
+            model_metrics = sidecar.get('metrics') or {}
+        elif os.path.exists('dataset.csv'):
+            # No sidecar yet: score the dataset once and persist the metrics
+            df, _ = load_and_preprocess_data()
+            X = df[FEATURE_COLUMNS]
             y = df['target_price']
             y_pred = model.predict(X)
             
@@ -880,8 +968,18 @@ def load_model():
                 'r2_score': float(r2),
                 'model_type': 'Random Forest Regressor',
                 'training_samples': len(X),
-                'feature_importance': dict(zip(feature_columns, model.feature_importances_))
+                'feature_importance': dict(zip(FEATURE_COLUMNS, model.feature_importances_))
             }
+            write_metadata_sidecar('pricing_model.pkl', {
+                'metrics': model_metrics,
+                'features': feature_metadata(FEATURE_COLUMNS, label_encoders),
+                'row_count': len(df)
+            })
+        
+        # Prices are filled in on first lookup instead of scoring the catalog at boot
+        bundle = ModelBundle.build(model, label_encoders, model_metrics, next_model_version())
+        price_table.start_version(bundle.version)
+        active_bundle = bundle
         
         return True
     return False
@@ -900,7 +998,7 @@ async def root():
             "ML Model Management"
         ],
         "endpoints": {
-            "auth": ["/auth/register", "/auth/login", "/auth/me"],
+            "auth": ["/auth/register", "/auth/login", "/auth/refresh", "/auth/logout", "/auth/me"],
             "products": ["/products", "/products/{id}"],
             "cart": ["/cart", "/cart/{id}"],
             "orders": ["/orders", "/orders/{id}"],
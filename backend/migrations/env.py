@@ -0,0 +1,53 @@
+"""Alembic environment: migrates the database configured in database.py.
+
+``database.run_migrations()`` passes its open connection in
+``config.attributes['connection']``; the ``alembic`` command line connects
+through ``database.engine`` instead.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import Base, engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit the SQL for the migrations instead of running them"""
+    context.configure(
+        url=engine.url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+    with engine.connect() as connection:
+        do_run_migrations(connection)
+
+
+def do_run_migrations(connection):
+    # Batch mode lets SQLite emulate ALTER TABLE operations it does not support
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,120 @@
+"""Baseline schema (the tables create_tables() used to create with create_all)
+
+Databases created before migrations existed already have these tables; they
+are skipped, so ``alembic upgrade head`` works on old and new databases alike.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def create_table_if_missing(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade():
+    create_table_if_missing(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('role', sa.String()),
+        sa.Column('is_active', sa.Boolean()),
+        sa.Column('profile_picture', sa.String()),
+        sa.Column('phone', sa.String()),
+        sa.Column('address', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        indexes=[
+            ('ix_users_id', ['id'], False),
+            ('ix_users_email', ['email'], True),
+            ('ix_users_username', ['username'], True),
+        ]
+    )
+    create_table_if_missing(
+        'products',
+        sa.Column('product_id', sa.Integer(), primary_key=True),
+        sa.Column('product_name', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('base_price', sa.Float(), nullable=False),
+        sa.Column('inventory_level', sa.Integer(), nullable=False),
+        sa.Column('competitor_avg_price', sa.Float(), nullable=False),
+        sa.Column('sales_last_30_days', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('season', sa.String(), nullable=False),
+        sa.Column('brand_tier', sa.String(), nullable=False),
+        sa.Column('material_cost', sa.Float(), nullable=False),
+        sa.Column('target_price', sa.Float(), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('image_url', sa.String()),
+        sa.Column('is_active', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        indexes=[('ix_products_product_id', ['product_id'], False)]
+    )
+    create_table_if_missing(
+        'user_wishlists',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id'))
+    )
+    create_table_if_missing(
+        'cart_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id')),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('added_at', sa.DateTime(), server_default=sa.func.now()),
+        indexes=[('ix_cart_items_id', ['id'], False)]
+    )
+    create_table_if_missing(
+        'orders',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String()),
+        sa.Column('shipping_address', sa.Text(), nullable=False),
+        sa.Column('payment_method', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+        indexes=[('ix_orders_id', ['id'], False)]
+    )
+    create_table_if_missing(
+        'order_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id')),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id')),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('price_at_time', sa.Float(), nullable=False),
+        indexes=[('ix_order_items_id', ['id'], False)]
+    )
+    create_table_if_missing(
+        'reviews',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id')),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        indexes=[('ix_reviews_id', ['id'], False)]
+    )
+
+
+def downgrade():
+    for name in ('reviews', 'order_items', 'orders', 'cart_items', 'user_wishlists', 'products', 'users'):
+        op.drop_table(name)
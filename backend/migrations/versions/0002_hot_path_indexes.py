@@ -0,0 +1,71 @@
+"""Indexes for the hot queries and a unique (user_id, product_id) cart line
+
+Product listing indexes are partial (active products only) and end in
+product_id, so they serve both the filter and the keyset-paginated order.
+Duplicate cart lines are merged into the oldest one before the unique index
+is created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-02 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+ACTIVE_PRODUCTS = {
+    'sqlite_where': sa.text('is_active = 1'),
+    'postgresql_where': sa.text('is_active')
+}
+
+# (name, table, columns, unique, partial on active products)
+INDEXES = [
+    # Listing sort modes: popularity, price_low / price_high, rating, newest
+    ('ix_products_active_popularity', 'products', ['sales_last_30_days', 'product_id'], False, True),
+    ('ix_products_active_price', 'products', ['base_price', 'product_id'], False, True),
+    ('ix_products_active_rating', 'products', ['rating', 'product_id'], False, True),
+    ('ix_products_active_newest', 'products', ['created_at', 'product_id'], False, True),
+    # Listing filters, ordered by the default (popularity) sort
+    ('ix_products_active_category', 'products', ['category', 'sales_last_30_days', 'product_id'], False, True),
+    ('ix_products_active_brand_tier', 'products', ['brand_tier', 'sales_last_30_days', 'product_id'], False, True),
+    ('ix_products_active_season', 'products', ['season', 'sales_last_30_days', 'product_id'], False, True),
+    # Also serves every cart_items.user_id lookup
+    ('uq_cart_items_user_product', 'cart_items', ['user_id', 'product_id'], True, False),
+    ('ix_orders_user_created', 'orders', ['user_id', 'created_at'], False, False),
+    ('ix_orders_created_at', 'orders', ['created_at'], False, False),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], False, False),
+    ('ix_reviews_product_created', 'reviews', ['product_id', 'created_at'], False, False),
+]
+
+
+def merge_duplicate_cart_items():
+    """Fold repeated (user_id, product_id) cart lines into the oldest one"""
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(c.quantity) FROM cart_items c
+            WHERE c.user_id = cart_items.user_id AND c.product_id = cart_items.product_id
+        )
+        WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1)
+    """)
+    op.execute("""
+        DELETE FROM cart_items
+        WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id)
+    """)
+
+
+def upgrade():
+    merge_duplicate_cart_items()
+    for name, table, columns, unique, partial in INDEXES:
+        op.create_index(name, table, columns, unique=unique, **(ACTIVE_PRODUCTS if partial else {}))
+
+
+def downgrade():
+    for name, table, _, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""Immutable bundle of everything needed to serve one trained model.
+
+The model, its label encoders (raw and compiled), the flat-array forest,
+metrics and version are published together as a single object. Activating a
+new model is one reference assignment, so a request that grabbed the bundle
+at its start sees a consistent model/encoder pair even if a retrain finishes
+mid-flight.
+
+All serving paths score with ``flat_forest``. ``model`` holds the sklearn
+estimator only when it is already in memory (a freshly trained model); bundles
+loaded from the registry leave it ``None`` and serve from the memory-mapped
+node arrays alone.
+"""
+from typing import Any, Dict, NamedTuple, Optional
+
+from encoders import compile_encoders
+from tree_engine import FlatForest
+
+
+class ModelBundle(NamedTuple):
+    model: Optional[Any]
+    flat_forest: FlatForest
+    label_encoders: Dict[str, Any]
+    compiled_encoders: Dict[str, Any]
+    metrics: Dict[str, Any]
+    version: int
+
+    @classmethod
+    def build(cls, model, label_encoders, metrics, version, flat_forest=None):
+        """Derive the compiled encoders (and the flat forest, unless given) for a fitted model"""
+        return cls(
+            model=model,
+            flat_forest=flat_forest if flat_forest is not None else FlatForest.from_model(model),
+            label_encoders=label_encoders,
+            compiled_encoders=compile_encoders(label_encoders),
+            metrics=metrics,
+            version=version
+        )
@@ -0,0 +1,300 @@
+"""Versioned on-disk registry of trained pricing models.
+
+Every trained model is stored under its own version directory instead of
+overwriting ``pricing_model.pkl`` in place:
+
+    model_registry/
+        ACTIVE.json          active version and activation history
+        jobs/                training job records shared by all workers (training_jobs.py)
+        v0001/
+            pricing_model.pkl
+            flat_forest.joblib   node arrays, memory-mapped by every worker
+            label_encoders.pkl
+            metadata.json    metrics, features, training row count, dataset hash, training time
+
+Version directories are written under a temporary name and renamed into place,
+and the active pointer is replaced atomically, so a crash never leaves a
+half-written version active. Allocating the next version number and updating
+``ACTIVE.json`` happen under an exclusive lock on ``.lock`` in the registry
+directory, so training processes running side by side (the process pool, or
+several workers) never claim the same version or lose an activation. Recently used bundles stay in memory, which makes
+switching back to one of them (a rollback) a reference swap rather than a
+reload.
+
+Serving never unpickles ``pricing_model.pkl``: bundles are built from
+``flat_forest.joblib``, whose uncompressed node arrays are opened with
+``joblib.load(mmap_mode='r')`` so all worker processes share the same
+read-only pages. The sklearn pickle is kept for retraining and inspection.
+
+Metrics are only ever computed at training time and read back from
+``metadata.json``, so loading a version never touches the dataset. The
+unversioned ``pricing_model.pkl`` gets the same treatment through a
+``model_metadata.json`` sidecar.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+import joblib
+
+from model_bundle import ModelBundle
+from tree_engine import FlatForest
+
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'model_registry')
+# Loaded bundles kept in memory for instant activation / rollback
+MODEL_BUNDLE_CACHE_SIZE = int(os.getenv('MODEL_BUNDLE_CACHE_SIZE', '3'))
+
+MODEL_FILE = 'pricing_model.pkl'
+FOREST_FILE = 'flat_forest.joblib'
+ENCODERS_FILE = 'label_encoders.pkl'
+METADATA_FILE = 'metadata.json'
+ACTIVE_FILE = 'ACTIVE.json'
+LOCK_FILE = '.lock'
+# Sidecar next to an unversioned pricing_model.pkl
+METADATA_SIDECAR = 'model_metadata.json'
+
+# Activations remembered for rollback
+MAX_ACTIVATION_HISTORY = 20
+
+
+class ModelVersionNotFound(LookupError):
+    """Raised when a requested model version is not in the registry"""
+
+    def __init__(self, version):
+        super().__init__(f"Model version {version} not found")
+        self.version = version
+
+
+def hash_file(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_dataset(path):
+    """SHA-256 of a dataset file, recorded with each version for provenance"""
+    return hash_file(path)
+
+
+def feature_metadata(feature_columns, label_encoders):
+    """Feature layout the model was trained on: column order and known categories"""
+    return {
+        'columns': list(feature_columns),
+        'categories': {column: encoder.classes_.tolist() for column, encoder in label_encoders.items()}
+    }
+
+
+def read_metadata_sidecar(model_path, sidecar_path=METADATA_SIDECAR):
+    """Metadata saved next to an unversioned model file, or None if missing or stale"""
+    if not (os.path.exists(sidecar_path) and os.path.exists(model_path)):
+        return None
+    with open(sidecar_path) as f:
+        metadata = json.load(f)
+    # A model file replaced without its sidecar must not inherit the old metrics,
+    # even when the retrained pickle happens to have the same size
+    if metadata.get('model_sha256') != hash_file(model_path):
+        return None
+    return metadata
+
+
+def write_metadata_sidecar(model_path, metadata, sidecar_path=METADATA_SIDECAR):
+    write_json_atomic(sidecar_path, {**metadata, 'model_sha256': hash_file(model_path)})
+
+
+def write_json_atomic(path, data):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """Stores, lists and loads model versions; tracks which one is active"""
+
+    def __init__(self, root=None, cache_size=None):
+        self.root = root or MODEL_REGISTRY_DIR
+        self.cache_size = cache_size or MODEL_BUNDLE_CACHE_SIZE
+        self._bundles = OrderedDict()
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the registry lock across threads and processes"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, LOCK_FILE), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _version_dir(self, version):
+        return os.path.join(self.root, f"v{int(version):04d}")
+
+    def versions(self):
+        """Registered version numbers in ascending order"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            int(name[1:]) for name in os.listdir(self.root)
+            if name.startswith('v') and name[1:].isdigit()
+        )
+
+    def metadata(self, version):
+        path = os.path.join(self._version_dir(version), METADATA_FILE)
+        if not os.path.exists(path):
+            raise ModelVersionNotFound(version)
+        with open(path) as f:
+            return json.load(f)
+
+    def list(self):
+        """Metadata of every version, newest first"""
+        return [self.metadata(version) for version in reversed(self.versions())]
+
+    def register(self, model, label_encoders, metrics, row_count=None, dataset_hash=None,
+                 trained_at=None, training_seconds=None, features=None, source='train'):
+        """Persist a trained model as the next version and return its metadata"""
+        os.makedirs(self.root, exist_ok=True)
+        metadata = {
+            'version': None,
+            'source': source,
+            'trained_at': trained_at or datetime.utcnow().isoformat(),
+            'training_seconds': training_seconds,
+            'row_count': row_count,
+            'dataset_hash': dataset_hash,
+            'features': features,
+            'metrics': metrics
+        }
+
+        # The slow part (pickling) happens outside the lock; only numbering and the rename are serialized
+        staging_dir = tempfile.mkdtemp(dir=self.root, prefix='.staging-')
+        try:
+            joblib.dump(model, os.path.join(staging_dir, MODEL_FILE))
+            FlatForest.from_model(model).save(os.path.join(staging_dir, FOREST_FILE))
+            joblib.dump(label_encoders, os.path.join(staging_dir, ENCODERS_FILE))
+            with self._exclusive():
+                existing = self.versions()
+                metadata['version'] = existing[-1] + 1 if existing else 1
+                with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                os.rename(staging_dir, self._version_dir(metadata['version']))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        return metadata
+
+    def load_bundle(self, version):
+        """Serving bundle for a version, from memory when recently used"""
+        version = int(version)
+        with self._lock:
+            bundle = self._bundles.get(version)
+            if bundle is not None:
+                self._bundles.move_to_end(version)
+                return bundle
+
+        metadata = self.metadata(version)
+        version_dir = self._version_dir(version)
+        label_encoders = joblib.load(os.path.join(version_dir, ENCODERS_FILE))
+        bundle = ModelBundle.build(
+            None, label_encoders, metadata.get('metrics') or {}, version,
+            flat_forest=FlatForest.load(self.forest_path(version))
+        )
+        self.cache_bundle(bundle)
+        return bundle
+
+    def forest_path(self, version):
+        """Path of a version's memory-mappable node arrays, exported on first use for older versions"""
+        path = os.path.join(self._version_dir(version), FOREST_FILE)
+        if not os.path.exists(path):
+            with self._lock:
+                if not os.path.exists(path):
+                    model = joblib.load(os.path.join(self._version_dir(version), MODEL_FILE))
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    FlatForest.from_model(model).save(tmp_path)
+                    os.replace(tmp_path, path)
+        return path
+
+    def cache_bundle(self, bundle):
+        """Keep a built bundle in memory so re-activating it is instant"""
+        with self._lock:
+            self._bundles[bundle.version] = bundle
+            self._bundles.move_to_end(bundle.version)
+            while len(self._bundles) > self.cache_size:
+                self._bundles.popitem(last=False)
+
+    def _read_active(self):
+        path = os.path.join(self.root, ACTIVE_FILE)
+        if not os.path.exists(path):
+            return {'active': None, 'history': []}
+        with open(path) as f:
+            return json.load(f)
+
+    def active_version(self):
+        return self._read_active()['active']
+
+    def set_active(self, version):
+        """Record ``version`` as active; the previous one is kept for rollback"""
+        version = int(version)
+        if version not in self.versions():
+            raise ModelVersionNotFound(version)
+
+        with self._exclusive():
+            state = self._read_active()
+            history = state['history']
+            if state['active'] is not None and state['active'] != version:
+                history = (history + [state['active']])[-MAX_ACTIVATION_HISTORY:]
+            write_json_atomic(os.path.join(self.root, ACTIVE_FILE), {
+                'active': version,
+                'activated_at': datetime.utcnow().isoformat(),
+                'history': history
+            })
+
+    def rollback_target(self):
+        """Version that was active before the current one, or None"""
+        state = self._read_active()
+        available = set(self.versions())
+        for version in reversed(state['history']):
+            if version != state['active'] and version in available:
+                return version
+        return None
+
+    def pop_rollback(self):
+        """Make the previously active version current again, dropping the current one from history"""
+        with self._exclusive():
+            target = self.rollback_target()
+            if target is None:
+                return None
+            state = self._read_active()
+            history = state['history']
+            # Drop everything after the target so repeated rollbacks keep walking back
+            history = history[:len(history) - 1 - history[::-1].index(target)]
+            write_json_atomic(os.path.join(self.root, ACTIVE_FILE), {
+                'active': target,
+                'activated_at': datetime.utcnow().isoformat(),
+                'history': history
+            })
+            return target
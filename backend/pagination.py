@@ -0,0 +1,137 @@
+"""Keyset (cursor) pagination for product listings.
+
+``OFFSET`` pagination makes the database walk and discard every skipped row,
+so page 500 costs 500 times page 1. A keyset cursor instead records the sort
+value and ``product_id`` of the last row served; the next page starts right
+after that position (an index seek in SQL, a bisect over the catalog in
+memory), so every page costs the same.
+
+``product_id`` breaks ties in the same direction as the sort column, so the
+order is total and stable and a composite ``(column, product_id)`` index
+serves both ascending and descending scans. Cursors are opaque URL-safe
+strings bound to the sort mode they were issued for.
+
+Cursor values are compared exactly as the database stores and orders the
+column (``keyset_column``). SQLite keeps ``DateTime`` as TEXT, and rows written
+by ``CURRENT_TIMESTAMP`` (``'2025-09-12 20:47:57'``) and by SQLAlchemy
+(``'2025-09-12 20:47:57.000000'``) differ as strings; a cursor re-encoded from
+a parsed datetime would sort after every row of its own second, so ties would
+never reach the ``product_id`` tie-breaker and the same page would repeat.
+"""
+import base64
+import bisect
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, and_, asc, desc, or_, type_coerce
+
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '100'))
+
+# sort_by -> (sort column, descending)
+SORT_MODES = {
+    'popularity': ('sales_last_30_days', True),
+    'price_low': ('base_price', False),
+    'price_high': ('base_price', True),
+    'rating': ('rating', True),
+    'newest': ('created_at', True),
+    # BM25 rank of a full-text search (lower is better); only valid with a search term
+    'relevance': ('relevance', False),
+}
+DEFAULT_SORT = 'popularity'
+
+
+class PaginationError(ValueError):
+    """Unknown sort mode or a malformed / mismatched cursor"""
+
+
+def sort_mode(sort_by):
+    """``(column, descending)`` for a ``sort_by`` value"""
+    try:
+        return SORT_MODES[sort_by or DEFAULT_SORT]
+    except KeyError:
+        raise PaginationError(f"Unknown sort_by '{sort_by}' (expected one of: {', '.join(SORT_MODES)})")
+
+
+def page_size(limit):
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_by, value, product_id):
+    """Opaque cursor pointing just after the row ``(value, product_id)``"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by or DEFAULT_SORT, value, product_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by, field=None):
+    """``(value, product_id)`` stored in ``cursor``; it must have been issued for ``sort_by``.
+
+    ``field`` is the column the cursor value comes from (the sort mode's column
+    by default). ``created_at`` values are the stored text, every other field is
+    numeric; anything else is rejected here rather than failing in the seek.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        product_id = int(product_id)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if cursor_sort != (sort_by or DEFAULT_SORT):
+        raise PaginationError(f"Cursor was issued for sort_by '{cursor_sort}', not '{sort_by}'")
+    if (field or sort_mode(sort_by)[0]) == 'created_at':
+        valid = isinstance(value, str)
+    else:
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not valid:
+        raise PaginationError("Invalid cursor")
+    return value, product_id
+
+
+# SQL keyset queries
+
+def keyset_column(column):
+    """``column`` as stored, for ordering, reading cursor values and seeking.
+
+    ``DateTime`` values are read and bound as the raw stored value (TEXT on
+    SQLite) instead of round-tripping through ``datetime``, so a cursor compares
+    equal to the row it was taken from. The SQL is unchanged, so the
+    ``(column, product_id)`` index still serves the seek.
+    """
+    if isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def order_query(query, column, id_column, descending):
+    direction = desc if descending else asc
+    return query.order_by(direction(column), direction(id_column))
+
+
+def seek_query(query, column, id_column, descending, value, product_id):
+    """Restrict an ordered query to the rows after ``(value, product_id)``.
+
+    The redundant bound on ``column`` alone is what lets the database seek the
+    ``(column, product_id)`` index instead of filtering every row before it.
+    """
+    if descending:
+        return query.filter(and_(column <= value, or_(column < value, id_column < product_id)))
+    return query.filter(and_(column >= value, or_(column > value, id_column > product_id)))
+
+
+# In-memory keyset over listing columns
+
+def sorted_positions(values, product_ids, descending):
+    """Row positions in listing order plus the ascending keys to bisect a cursor into"""
+    sign = -1 if descending else 1
+    keys = sorted((sign * value, sign * product_id, position)
+                  for position, (value, product_id) in enumerate(zip(values, product_ids)))
+    order = [key[2] for key in keys]
+    return order, [key[:2] for key in keys]
+
+
+def seek_position(keys, descending, value, product_id):
+    """Index in the listing order of the first row after ``(value, product_id)``"""
+    sign = -1 if descending else 1
+    return bisect.bisect_right(keys, (sign * value, sign * product_id))
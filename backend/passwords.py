@@ -0,0 +1,61 @@
+"""Password hashing shared by both apps.
+
+bcrypt is deliberately slow: one hash or verification costs tens to hundreds
+of milliseconds of CPU depending on its cost factor, so it never runs on the
+event loop. ``hash_password_async`` and ``verify_and_update_async`` run it on
+the dedicated hashing pool in ``executors`` (sized to the cores, with a bounded
+queue), so a login burst queues there, or is turned away with a 503 once the
+queue is full, instead of freezing every other request. Only the hashing
+itself goes to the pool; user lookups and commits stay on the request's own
+session, so a hashing slot is never held during database I/O.
+
+``BCRYPT_ROUNDS`` sets the cost for new hashes (each +1 doubles the work).
+Hashes made with a different cost still verify; on the next successful login
+they are re-hashed with the current cost (``verify_and_update``), so raising
+or lowering it migrates users gradually without a password reset.
+"""
+import os
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from executors import run_hashing
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def hash_password(password):
+    return pwd_context.hash(password)
+
+
+def verify_password(password, hashed_password):
+    return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update(password, hashed_password):
+    """(valid, new_hash): new_hash is set when the hash should be replaced (cost changed)"""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def hashing_busy_exception():
+    """503 for ``PoolSaturated`` from the hashing pool"""
+    # The password hashing queue is full (login burst); shed the request instead of queueing it
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password_async(password):
+    return await run_hashing(hash_password, password)
+
+
+async def verify_password_async(password, hashed_password):
+    return await run_hashing(verify_password, password, hashed_password)
+
+
+async def verify_and_update_async(password, hashed_password):
+    return await run_hashing(verify_and_update, password, hashed_password)
@@ -0,0 +1,117 @@
+"""Precomputed model prices keyed by (model version, product row hash).
+
+Prices only change when the model or a product's pricing features change, so
+listings, product pages, carts and wishlists can serve ``predicted_price`` by
+lookup instead of re-running the model on every request. The table is rebuilt
+in bulk whenever a new model version becomes active; products it has not seen
+yet are scored in one batch on first lookup and added. Tables for the last few
+versions are kept, so rolling back to a recent model starts warm.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from pricing_engine import NUMERIC_FEATURES, CATEGORICAL_FEATURES, predict_prices
+
+# Model versions whose price tables are kept in memory
+PRICE_TABLE_VERSIONS = int(os.getenv('PRICE_TABLE_VERSIONS', '3'))
+
+
+def hash_rows(df):
+    """Stable 64-bit hash of each row's pricing features.
+
+    Numeric columns are normalised to float64 and categoricals to str so a row
+    read from ``dataset.csv`` hashes the same as the equivalent ORM product.
+    """
+    features = pd.DataFrame({
+        **{col: pd.to_numeric(df[col], errors='coerce').astype(np.float64) for col in NUMERIC_FEATURES},
+        **{col: df[col].astype(str) for col in CATEGORICAL_FEATURES}
+    })
+    return pd.util.hash_pandas_object(features, index=False).to_numpy()
+
+
+class PriceTable:
+    """In-process price tables for the active and most recently active model versions"""
+
+    def __init__(self, max_versions=None):
+        self._lock = threading.Lock()
+        self._tables = OrderedDict()
+        self.max_versions = max_versions or PRICE_TABLE_VERSIONS
+        self.model_version = None
+
+    def rebuild(self, model, encoders, model_version, df, row_hashes=None):
+        """Re-score ``df`` in bulk and replace the table with the new version's prices"""
+        if row_hashes is None:
+            row_hashes = hash_rows(df)
+        predictions = predict_prices(model, encoders, df)
+        prices = {(model_version, row_hash): price for row_hash, price in zip(row_hashes, predictions)}
+
+        with self._lock:
+            self._tables[model_version] = prices
+            self._activate(model_version)
+
+    def start_version(self, model_version):
+        """Activate an empty table for a version; prices are filled in on first lookup"""
+        with self._lock:
+            self._tables[model_version] = {}
+            self._activate(model_version)
+
+    def has_version(self, model_version):
+        with self._lock:
+            return model_version in self._tables
+
+    def activate(self, model_version):
+        """Make an already built table current again; False if it was evicted"""
+        with self._lock:
+            if model_version not in self._tables:
+                return False
+            self._activate(model_version)
+            return True
+
+    def _activate(self, model_version):
+        self._tables.move_to_end(model_version)
+        while len(self._tables) > self.max_versions:
+            self._tables.popitem(last=False)
+        self.model_version = model_version
+
+    def lookup(self, model, encoders, model_version, df, row_hashes=None):
+        """Predicted prices aligned with ``df``; NaN for rows that cannot be scored.
+
+        Rows missing from the table are scored with a single batch predict and
+        stored, so steady-state lookups never touch the model. Requests for a
+        version without a table (e.g. in flight across a model swap) are
+        scored directly and never disturb the tables. Pass precomputed
+        ``row_hashes`` (e.g. from a catalog snapshot) to skip hashing ``df``.
+        """
+        with self._lock:
+            prices = self._tables.get(model_version)
+        if prices is None:
+            return predict_prices(model, encoders, df)
+
+        if row_hashes is None:
+            row_hashes = hash_rows(df)
+        predictions = np.array([prices.get((model_version, row_hash), np.nan) for row_hash in row_hashes], dtype=np.float64)
+
+        missing = np.array([(model_version, row_hash) not in prices for row_hash in row_hashes], dtype=bool)
+        if missing.any():
+            scored = predict_prices(model, encoders, df[missing])
+            predictions[missing] = scored
+            with self._lock:
+                if self._tables.get(model_version) is prices:
+                    prices.update(
+                        {(model_version, row_hash): price for row_hash, price in zip(row_hashes[missing], scored)}
+                    )
+
+        return predictions
+
+    def stats(self):
+        """Current table size and version, plus the versions kept warm"""
+        with self._lock:
+            return {
+                'model_version': self.model_version,
+                'entries': len(self._tables.get(self.model_version, {})),
+                'cached_versions': list(self._tables.keys())
+            }
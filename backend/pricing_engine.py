@@ -0,0 +1,119 @@
+"""Batch pricing engine shared by the API entry points.
+
+Builds the model feature matrix for a whole catalog (or one page of it) in a
+single NumPy pass and scores it with one ``model.predict`` call, instead of
+encoding and predicting one product at a time.
+"""
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = [
+    'base_price', 'inventory_level', 'competitor_avg_price',
+    'sales_last_30_days', 'rating', 'review_count', 'material_cost'
+]
+CATEGORICAL_FEATURES = ['category', 'season', 'brand_tier']
+
+# Columns needed to score a product, in model feature order
+FEATURE_COLUMNS = NUMERIC_FEATURES + [col + '_encoded' for col in CATEGORICAL_FEATURES]
+
+# Confidence reported when a product could not be scored
+FALLBACK_CONFIDENCE = 0.85
+
+
+def products_to_frame(products):
+    """Convert ORM product objects into a DataFrame with the model input columns"""
+    columns = ['product_id'] + NUMERIC_FEATURES + CATEGORICAL_FEATURES + ['target_price']
+    return pd.DataFrame(
+        {col: [getattr(product, col) for product in products] for col in columns},
+        columns=columns
+    )
+
+
+def build_feature_matrix(df, encoders):
+    """Encode a product frame into the model feature matrix using compiled encoders.
+
+    Returns ``(X, valid)`` where ``X`` is a float64 array with one row per
+    product and ``valid`` is a boolean mask of rows that could be encoded.
+    Rows with missing numeric values, or unseen categories under the "error"
+    policy, are flagged invalid so the caller can fall back for them
+    individually.
+    """
+    n_rows = len(df)
+    X = np.zeros((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+    valid = np.ones(n_rows, dtype=bool)
+
+    numeric = df[NUMERIC_FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    valid &= ~np.isnan(numeric).any(axis=1)
+    X[:, :len(NUMERIC_FEATURES)] = np.nan_to_num(numeric)
+
+    for offset, col in enumerate(CATEGORICAL_FEATURES, start=len(NUMERIC_FEATURES)):
+        X[:, offset], known = encoders[col].encode_array(df[col].to_numpy(dtype=object))
+        valid &= known
+
+    return X, valid
+
+
+def predict_prices(model, encoders, df):
+    """Score every row of ``df`` with a single ``model.predict`` call.
+
+    ``model`` is the fitted forest or its ``FlatForest`` export; both predict
+    identically. Returns a float array aligned with ``df``; rows that could not
+    be scored (or every row, when no model is loaded) are NaN.
+    """
+    predictions = np.full(len(df), np.nan)
+    if model is None or len(df) == 0:
+        return predictions
+
+    X, valid = build_feature_matrix(df, encoders)
+    if valid.any():
+        predictions[valid] = model.predict(X[valid])
+    return predictions
+
+
+def confidence_score(model_metrics):
+    """Confidence reported alongside predictions, derived from the model R² score"""
+    return round(float(min(0.95, max(0.6, model_metrics.get('r2_score', 0.8)))), 3)
+
+
+def price_recommendation(price_change):
+    """Human-readable pricing recommendation for a predicted price change (in %)"""
+    if price_change > 5:
+        return "Price increase recommended due to market conditions"
+    elif price_change < -5:
+        return "Price reduction suggested to boost sales"
+    return "Current pricing is optimal"
+
+
+def invalid_row_reason(row, encoders):
+    """Explain why a product row could not be encoded into the feature matrix"""
+    for col in CATEGORICAL_FEATURES:
+        if row[col] not in encoders[col]:
+            return f"Unknown {col} '{row[col]}'"
+    return "Invalid numeric feature values"
+
+
+def score_product_inputs(model, encoders, model_metrics, records):
+    """Score a batch of validated product input dicts with one ``model.predict`` call.
+
+    Returns one result dict per record, in order. Records that cannot be
+    scored get an ``error`` message instead of failing the whole batch.
+    """
+    df = pd.DataFrame(records, columns=['product_name'] + NUMERIC_FEATURES + CATEGORICAL_FEATURES)
+    predictions = predict_prices(model, encoders, df)
+    confidence = confidence_score(model_metrics)
+
+    results = []
+    for row, predicted_price in zip(df.to_dict('records'), predictions):
+        if np.isnan(predicted_price):
+            results.append({'error': invalid_row_reason(row, encoders)})
+        elif row['base_price'] <= 0:
+            results.append({'error': "base_price must be greater than 0"})
+        else:
+            price_change = ((predicted_price - row['base_price']) / row['base_price']) * 100
+            results.append({
+                'predicted_price': round(float(predicted_price), 2),
+                'confidence_score': confidence,
+                'price_change_percentage': round(float(price_change), 2),
+                'recommendation': price_recommendation(price_change)
+            })
+    return results
@@ -0,0 +1,90 @@
+"""Long-lived refresh tokens, shared by both apps.
+
+An access token lives ``ACCESS_TOKEN_EXPIRE_MINUTES``; without a refresh token
+the client has to send the password again when it expires, and every login is
+a bcrypt verification on the hashing pool. Login and registration also return
+a refresh token (a JWT with ``type: refresh`` and a random ``jti``, valid for
+``REFRESH_TOKEN_EXPIRE_DAYS``), and ``/auth/refresh`` trades it for a new
+access token: a signature check plus two primary-key lookups, no password
+hash involved.
+
+Refresh tokens are never accepted as access tokens (the apps reject
+``type: refresh`` on their bearer dependencies). ``/auth/logout`` revokes one
+by storing its ``jti`` in ``revoked_tokens`` until the token would have
+expired; nothing is stored for tokens that are issued and simply age out, so
+the table only holds revoked, still-valid tokens and ``purge_expired`` keeps
+it that way.
+
+Settings (optional):
+    REFRESH_TOKEN_EXPIRE_DAYS   lifetime of a refresh token in days (14)
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from database import RevokedToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', '14'))
+REFRESH_TOKEN_TYPE = 'refresh'
+
+
+def refresh_claims(username, user_id=None):
+    """Claims of a new refresh token for ``username``, ready to be signed"""
+    return {
+        'sub': username,
+        'uid': user_id,
+        'type': REFRESH_TOKEN_TYPE,
+        'jti': uuid.uuid4().hex,
+        'exp': datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    }
+
+
+def is_refresh_token(payload):
+    return payload.get('type') == REFRESH_TOKEN_TYPE
+
+
+def expiry(payload):
+    """The token's ``exp`` claim as a naive UTC datetime"""
+    return datetime.utcfromtimestamp(payload['exp'])
+
+
+def is_revoked(db, jti):
+    return db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti)).first() is not None
+
+
+def revoke(db, payload):
+    """Record the refresh token with these claims as revoked; revoking twice is a no-op"""
+    db.add(RevokedToken(jti=payload['jti'], expires_at=expiry(payload)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def purge_expired(db):
+    """Delete revocations of tokens that have expired anyway; returns the number removed"""
+    result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    db.commit()
+    return result.rowcount
+
+
+async def is_revoked_async(db, jti):
+    result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+    return result.first() is not None
+
+
+async def revoke_async(db, payload):
+    db.add(RevokedToken(jti=payload['jti'], expires_at=expiry(payload)))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+
+
+async def purge_expired_async(db):
+    result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    await db.commit()
+    return result.rowcount
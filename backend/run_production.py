@@ -0,0 +1,245 @@
+"""Production server: preload once, then fork uvicorn workers.
+
+The parent process imports the app, migrates the database, loads the active
+model bundle and warms the price table, then binds the listening socket and
+forks N workers. Migrations run only here: workers started at the same time
+would otherwise all run Alembic's upgrade at once and race on
+``alembic_version``. Workers
+inherit the loaded model, catalog prices and socket copy-on-write, so they
+start serving immediately and the memory is shared rather than duplicated.
+
+Signals sent to the parent:
+    SIGTERM / SIGINT  graceful shutdown: workers stop accepting, finish in-flight
+                      requests (up to --graceful-timeout), then exit
+    SIGHUP            rolling restart: reload the model in the parent, then
+                      replace workers one at a time without closing the socket
+    SIGTTIN / SIGTTOU add / remove one worker
+
+Workers follow model activations and rollbacks made through any other worker
+by watching the model registry (MODEL_WATCH_INTERVAL), so a new model version
+never needs a restart. Crashed workers are replaced automatically. Each worker
+gets a WORKER_INDEX slot (0..N-1); only worker 0 trains when no model exists.
+
+    python run_production.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+
+
+def bind_socket(host, port, backlog):
+    """Listening socket shared by every worker"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerSupervisor:
+    """Forks uvicorn workers from a preloaded parent and keeps N of them running"""
+
+    def __init__(self, app_module, sock, workers, graceful_timeout, log_level, access_log):
+        self.app_module = app_module
+        self.sock = sock
+        self.num_workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.access_log = access_log
+
+        self.workers = {}
+        self.retiring = set()
+        self.stopping = False
+        self.restart_requested = False
+
+    def free_slot(self):
+        """Lowest worker index not used by a running, non-retiring worker"""
+        used = {slot for pid, slot in self.workers.items() if pid not in self.retiring}
+        slot = 0
+        while slot in used:
+            slot += 1
+        return slot
+
+    def spawn_worker(self):
+        slot = self.free_slot()
+        pid = os.fork()
+        if pid != 0:
+            self.workers[pid] = slot
+            return pid
+
+        # Worker process: uvicorn installs its own SIGINT/SIGTERM handlers
+        exit_code = 0
+        try:
+            os.environ['WORKER_INDEX'] = str(slot)
+            # Boot time of a forked worker starts at the fork, not at the parent's import
+            self.app_module.boot_started = time.perf_counter()
+            for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            config = uvicorn.Config(
+                self.app_module.app,
+                log_level=self.log_level,
+                access_log=self.access_log,
+                timeout_graceful_shutdown=self.graceful_timeout
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} crashed: {str(e)}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def reap_workers(self):
+        """Collect exited workers; the run loop replaces any that were not retired on purpose"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif not self.stopping:
+                print(f"⚠️  Worker {pid} exited unexpectedly (status {status}), starting a replacement")
+
+    def stop_worker(self, pid, wait=True):
+        """Ask a worker to drain and exit"""
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        if wait:
+            self.wait_for_exit({pid}, self.graceful_timeout + 5)
+
+    def wait_for_exit(self, pids, timeout):
+        deadline = time.monotonic() + timeout
+        while pids & set(self.workers) and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in pids & set(self.workers):
+            print(f"⚠️  Worker {pid} did not drain in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+        self.reap_workers()
+
+    def rolling_restart(self, preload):
+        """Reload in the parent, then replace workers one at a time; the socket never closes"""
+        print("🔄 Rolling restart: reloading model in the parent")
+        preload()
+        gc.freeze()
+        for pid in list(self.workers):
+            # Retire first so the replacement takes over the same WORKER_INDEX slot
+            self.retiring.add(pid)
+            self.spawn_worker()
+            self.stop_worker(pid)
+        print("✅ Rolling restart complete")
+
+    def handle_signal(self, signum, frame):
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self.stopping = True
+        elif signum == signal.SIGHUP:
+            self.restart_requested = True
+        elif signum == signal.SIGTTIN:
+            self.num_workers += 1
+        elif signum == signal.SIGTTOU:
+            self.num_workers = max(1, self.num_workers - 1)
+
+    def run(self, preload):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, self.handle_signal)
+
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        print(f"👷 Started {len(self.workers)} workers: {', '.join(str(pid) for pid in self.workers)}")
+
+        while not self.stopping:
+            self.reap_workers()
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart(preload)
+
+            active = [pid for pid in self.workers if pid not in self.retiring]
+            for _ in range(self.num_workers - len(active)):
+                self.spawn_worker()
+            for pid in active[self.num_workers:]:
+                self.stop_worker(pid, wait=False)
+            time.sleep(0.5)
+
+        self.shutdown()
+
+    def shutdown(self):
+        """Drain every worker, then close the socket"""
+        print(f"🛑 Shutting down {len(self.workers)} workers (draining up to {self.graceful_timeout}s)")
+        pids = set(self.workers)
+        for pid in pids:
+            self.stop_worker(pid, wait=False)
+        self.wait_for_exit(pids, self.graceful_timeout + 5)
+        self.sock.close()
+        print("👋 All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=WEB_CONCURRENCY)
+    parser.add_argument('--graceful-timeout', type=int, default=GRACEFUL_TIMEOUT)
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--no-access-log', action='store_true')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("🚀 Starting AI Dynamic Pricing API (production)...")
+    print("="*60)
+
+    import main as app_module
+
+    if not hasattr(os, 'fork'):
+        print("⚠️  os.fork is not available on this platform, running a single worker")
+        uvicorn.run(app_module.app, host=args.host, port=args.port, log_level=args.log_level,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+        return
+
+    # Migrate once, before any worker exists; a failure stops the server instead of every worker
+    import database
+    started = time.perf_counter()
+    database.create_tables()
+    # Forked workers must not share the parent's pooled database connections
+    database.engine.dispose()
+    app_module.schema_ready = True
+    print(f"✅ Database migrated in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Load once in the parent so every worker shares the model and warm price table
+    started = time.perf_counter()
+    if app_module.preload_model():
+        print(f"✅ Preloaded model version {app_module.active_bundle.version} "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    else:
+        print("📚 No model to preload; worker 0 will train one in the background")
+    # Keep preloaded objects out of the GC's reach so collections don't dirty shared pages
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    print(f"📡 Listening on http://{args.host}:{args.port} with {args.workers} workers")
+    print("="*60 + "\n")
+
+    supervisor = WorkerSupervisor(
+        app_module, sock, args.workers, args.graceful_timeout, args.log_level, not args.no_access_log
+    )
+    supervisor.run(app_module.preload_model)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -160,6 +164,10 @@ class ReviewResponse(BaseModel):
         from_attributes = True
 
 # Search and filter schemas
+class ProductPage(BaseModel):
+    products: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
 class ProductFilter(BaseModel):
     category: Optional[str] = None
     min_price: Optional[float] = None
@@ -168,8 +176,9 @@ class ProductFilter(BaseModel):
     brand_tier: Optional[str] = None
     season: Optional[str] = None
     search: Optional[str] = None
-    sort_by: Optional[str] = "popularity"  # popularity, price_low, price_high, rating, newest
-    page: Optional[int] = 1
+    sort_by: Optional[str] = None  # popularity, price_low, price_high, rating, newest, relevance (default: relevance when searching, else popularity)
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    page: Optional[int] = 1  # offset pagination, used only without a cursor
     limit: Optional[int] = 20
 
 # Dashboard schemas
@@ -0,0 +1,108 @@
+"""SQLite FTS5 full-text index over product name, category and description.
+
+``products_fts`` is an external-content FTS5 table: it stores only the
+inverted index and reads the text back from ``products``. Triggers on
+``products`` keep it in sync on every insert, update and delete, so any code
+path that writes products (the API, ``migrate_data.py``, manual SQL) is
+covered. Matches are ranked with BM25, weighting the product name above the
+category above the description.
+
+Search terms are turned into prefix queries (``"wire"* "head"*``), so results
+appear while the user is still typing. On databases without FTS5 the caller
+falls back to ``ILIKE`` matching.
+"""
+import re
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, Text, literal_column, text
+
+FTS_TABLE = 'products_fts'
+
+# BM25 column weights: product_name, category, description
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+products_fts = Table(
+    FTS_TABLE, MetaData(),
+    Column('rowid', Integer, primary_key=True),
+    Column('product_name', Text),
+    Column('category', Text),
+    Column('description', Text),
+    # Hidden FTS5 column: bm25() with BM25_WEIGHTS, computed natively by FTS5
+    Column('rank', Float)
+)
+
+SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        product_name, category, description,
+        content='products', content_rowid='product_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, product_name, category, description)
+        VALUES (new.product_id, new.product_name, new.category, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, product_name, category, description)
+        VALUES ('delete', old.product_id, old.product_name, old.category, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF product_id, product_name, category, description ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, product_name, category, description)
+        VALUES ('delete', old.product_id, old.product_name, old.category, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, product_name, category, description)
+        VALUES (new.product_id, new.product_name, new.category, new.description);
+    END""",
+]
+
+_available = {}
+
+
+def fts_available(engine):
+    """Whether ``engine`` is SQLite with FTS5 and the index has been created"""
+    return _available.get(engine.url.render_as_string(), False)
+
+
+def create_search_index(engine):
+    """Create the FTS5 table and its triggers; index existing products the first time"""
+    key = engine.url.render_as_string()
+    if engine.dialect.name != 'sqlite':
+        _available[key] = False
+        return False
+    with engine.begin() as conn:
+        try:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+            ).first() is not None
+            for statement in SCHEMA:
+                conn.execute(text(statement))
+        except Exception as e:
+            print(f"⚠️  Full-text search unavailable, falling back to ILIKE: {str(e)}")
+            _available[key] = False
+            return False
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        conn.execute(
+            text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', :rank)"), {'rank': f'bm25({weights})'}
+        )
+        if not exists:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    _available[key] = True
+    return True
+
+
+def match_expression(term):
+    """FTS5 query for free-text user input: every word must match as a prefix"""
+    words = re.findall(r'\w+', term or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_products(query, id_column, term):
+    """Restrict ``query`` to products matching ``term``.
+
+    Returns the filtered query and the BM25 rank expression (lower is more
+    relevant), or ``(query, None)`` when the term has no searchable words.
+    """
+    expression = match_expression(term)
+    if not expression:
+        return query, None
+    query = query.join(products_fts, products_fts.c.rowid == id_column)
+    query = query.filter(literal_column(FTS_TABLE).op('MATCH')(expression))
+    return query, products_fts.c.rank
@@ -0,0 +1,359 @@
+"""Background training jobs.
+
+``POST /train`` and the retrain after ``/upload-data`` used to block the HTTP
+request until ``RandomForestRegressor.fit`` finished. Training now runs as a
+job: the request gets a job ID back immediately, the fit runs on the process
+pool, and the finished bundle is activated with a single atomic swap. Jobs run
+one at a time so two retrains can never race to activate.
+
+Cancelling a queued job removes it before it starts. A job that is already
+fitting cannot be interrupted inside the worker process: it reports
+``cancelling`` while the worker finishes the fit (which keeps its pool slot
+and the run lock busy), then becomes ``cancelled`` and its result is
+discarded instead of being activated.
+
+The production server runs several worker processes, and a job lives in the
+worker that accepted ``POST /train`` while status and cancel requests can
+land on any of them. Every state change is therefore written to one JSON
+record per job under ``model_registry/jobs/``, read-modify-written under an
+exclusive ``lockf`` lock, and the routes read from there. Cancelling a job
+owned by another worker sets ``cancel_requested`` in its record; the owner
+picks the flag up at its next step (starting the fit, or the fit returning).
+The "one at a time" rule also holds across workers: a job only starts fitting
+once it holds ``.run.lock`` in the jobs directory. A record whose worker has
+exited before the job finished is reported as failed.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: jobs are only serialized within this process
+    fcntl = None
+
+from executors import run_in_process, run_in_thread
+from model_registry import MODEL_REGISTRY_DIR, write_json_atomic
+
+JOBS_DIR = os.getenv('TRAINING_JOBS_DIR', os.path.join(MODEL_REGISTRY_DIR, 'jobs'))
+LOCK_FILE = '.lock'
+RUN_LOCK_FILE = '.run.lock'
+
+# Finished jobs kept for status queries
+MAX_JOB_HISTORY = 50
+
+# How often a job waiting for another worker's run checks the run lock and its cancel flag
+RUN_LOCK_POLL_SECONDS = float(os.getenv('TRAINING_RUN_LOCK_POLL_SECONDS', '1.0'))
+
+# Coarse progress reported for each stage of a job
+STAGE_PROGRESS = {
+    'queued': 0.0,
+    'fitting': 0.1,
+    'activating': 0.8,
+    'done': 1.0
+}
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+# Job IDs are uuid4 hex; anything else never names a record file
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingJob:
+    """State of one training run"""
+
+    def __init__(self, trigger):
+        self.id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.status = 'queued'  # queued, running, cancelling, succeeded, failed, cancelled
+        self.stage = 'queued'
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.metrics = None
+        self.model_version = None
+        self.error = None
+        self.cancel_requested = False
+        self.task = None
+
+    @property
+    def progress(self):
+        return STAGE_PROGRESS.get(self.stage, 0.0)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def request_cancel(self):
+        self.cancel_requested = True
+        if self.stage == 'fitting' and not self.finished:
+            # The worker process runs the fit to the end; the result is discarded
+            # when it returns. A job that is already activating runs to completion
+            self.status = 'cancelling'
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.stage = 'done'
+        self.finished_at = datetime.utcnow()
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'trigger': self.trigger,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'model_version': self.model_version,
+            'metrics': self.metrics,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested
+        }
+
+
+class JobStore:
+    """Job records shared by all worker processes, one JSON file per job"""
+
+    def __init__(self, root=None):
+        self.root = root or JOBS_DIR
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the job store lock across threads and processes"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, LOCK_FILE), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.lockf(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.lockf(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _read(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _report(self, record):
+        """Public view of a record; a job whose worker is gone can never finish"""
+        pid = record.pop('worker_pid', None)
+        if record['status'] not in FINISHED_STATUSES and pid is not None and not _pid_alive(pid):
+            record.update(status='failed', stage='done', progress=STAGE_PROGRESS['done'],
+                          error='Worker process exited before the job finished')
+        return record
+
+    def save(self, job):
+        """Write ``job``'s state, first merging in a cancel requested by another worker"""
+        with self._exclusive():
+            stored = self._read(job.id)
+            if stored is not None and stored.get('cancel_requested') and not job.cancel_requested:
+                job.request_cancel()
+            write_json_atomic(self._path(job.id), {**job.to_dict(), 'worker_pid': os.getpid()})
+
+    def cancel_requested(self, job_id):
+        record = self._read(job_id)
+        return bool(record and record.get('cancel_requested'))
+
+    def request_cancel(self, job_id):
+        """Flag a job owned by another worker; returns its record, or None if it does not exist"""
+        with self._exclusive():
+            record = self._read(job_id)
+            if record is None or record['status'] in FINISHED_STATUSES:
+                return self._report(record) if record is not None else None
+            record['cancel_requested'] = True
+            if record['stage'] in ('queued', 'fitting'):
+                # The owner finishes it as cancelled when it next looks at the flag
+                record['status'] = 'cancelling'
+            write_json_atomic(self._path(job_id), record)
+        return self._report(record)
+
+    def get(self, job_id):
+        record = self._read(job_id)
+        return self._report(record) if record is not None else None
+
+    def list(self):
+        """All kept job records, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        records = []
+        for name in os.listdir(self.root):
+            if name.endswith('.json') and not name.startswith('.'):
+                record = self._read(name[:-len('.json')])
+                if record is not None:
+                    records.append(self._report(record))
+        return sorted(records, key=lambda record: record['created_at'], reverse=True)
+
+    def prune(self):
+        """Drop the oldest finished records beyond MAX_JOB_HISTORY"""
+        records = self.list()
+        excess = len(records) - MAX_JOB_HISTORY
+        finished = [record for record in reversed(records) if record['status'] in FINISHED_STATUSES]
+        with self._exclusive():
+            for record in finished[:max(0, excess)]:
+                try:
+                    os.remove(self._path(record['job_id']))
+                except FileNotFoundError:
+                    pass
+
+    def try_acquire_run_lock(self):
+        """Open file holding the cross-worker run lock, or None while another job runs"""
+        os.makedirs(self.root, exist_ok=True)
+        lock_file = open(os.path.join(self.root, RUN_LOCK_FILE), 'a')
+        if fcntl is None:
+            return lock_file
+        try:
+            # lockf, not flock: process pool workers forked while a job holds the
+            # lock would inherit an flock and keep it after the job closes its file
+            fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (BlockingIOError, PermissionError):
+            lock_file.close()
+            return None
+        return lock_file
+
+
+class TrainingJobManager:
+    """Runs training jobs sequentially in the background.
+
+    ``fit_fn()`` runs in the process pool and must be picklable; its return
+    value is passed to ``activate_fn(*result)`` on the thread pool, which must
+    return the newly active model bundle. ``get``, ``list`` and ``cancel``
+    return job records (dicts) from ``store`` so they see jobs owned by any
+    worker; ``get`` and ``list`` read files, so call them off the event loop.
+    """
+
+    def __init__(self, fit_fn, activate_fn, store=None):
+        self.fit_fn = fit_fn
+        self.activate_fn = activate_fn
+        self.store = store or JobStore()
+        self._jobs = OrderedDict()
+        self._run_lock = None
+
+    def submit(self, trigger='manual'):
+        """Queue a new training job and start it in the background"""
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+
+        job = TrainingJob(trigger)
+        self._jobs[job.id] = job
+        # Written before returning so any worker can report the new job ID
+        self.store.save(job)
+        self._prune()
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    async def _run(self, job):
+        try:
+            await run_in_thread(self.store.prune)
+            async with self._run_lock:
+                run_lock = await self._acquire_run_lock(job)
+                if run_lock is None:
+                    job.finish('cancelled')
+                    await run_in_thread(self.store.save, job)
+                    return
+                try:
+                    await self._train(job)
+                finally:
+                    run_lock.close()
+        except asyncio.CancelledError:
+            job.finish('cancelled')
+            self.store.save(job)
+
+    async def _acquire_run_lock(self, job):
+        """Wait until no other worker is training; None if the job is cancelled meanwhile"""
+        while True:
+            run_lock = await run_in_thread(self.store.try_acquire_run_lock)
+            if run_lock is not None:
+                return run_lock
+            if job.cancel_requested or await run_in_thread(self.store.cancel_requested, job.id):
+                return None
+            await asyncio.sleep(RUN_LOCK_POLL_SECONDS)
+
+    async def _train(self, job):
+        job.status = 'running'
+        job.stage = 'fitting'
+        job.started_at = datetime.utcnow()
+        # Saving merges a cancel that arrived from another worker while queued
+        await run_in_thread(self.store.save, job)
+        if job.cancel_requested:
+            job.finish('cancelled')
+            await run_in_thread(self.store.save, job)
+            return
+
+        try:
+            trained = await run_in_process(self.fit_fn)
+            await run_in_thread(self.store.save, job)
+            if job.cancel_requested:
+                job.finish('cancelled')
+                await run_in_thread(self.store.save, job)
+                return
+
+            job.stage = 'activating'
+            await run_in_thread(self.store.save, job)
+            bundle = await run_in_thread(self.activate_fn, *trained)
+        except Exception as e:
+            print(f"❌ Training job {job.id} failed: {str(e)}")
+            job.finish('failed', error=str(e))
+            await run_in_thread(self.store.save, job)
+            return
+
+        job.metrics = bundle.metrics
+        job.model_version = bundle.version
+        job.finish('succeeded')
+        await run_in_thread(self.store.save, job)
+        print(f"✅ Training job {job.id} activated model version {bundle.version}")
+
+    async def cancel(self, job_id):
+        """Request cancellation; returns the job record, or None if it does not exist"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Owned by another worker (or already pruned here): flag it in the store
+            return await run_in_thread(self.store.request_cancel, job_id)
+        if job.finished:
+            return job.to_dict()
+
+        job.request_cancel()
+        if job.stage == 'queued' and job.task is not None:
+            # Drops a job still waiting for its turn
+            job.task.cancel()
+        await run_in_thread(self.store.save, job)
+        return job.to_dict()
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def list(self):
+        return self.store.list()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - MAX_JOB_HISTORY)]:
+            del self._jobs[job_id]
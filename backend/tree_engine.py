@@ -0,0 +1,113 @@
+"""Flat-array inference engine for the trained RandomForest.
+
+``RandomForestRegressor.predict`` on a single row pays sklearn input
+validation and joblib dispatch across every estimator, which dwarfs the cost
+of walking ~100 shallow trees. ``FlatForest`` exports the fitted
+``estimators_`` into contiguous NumPy node arrays and walks all trees at once,
+level by level, without going through sklearn.
+
+Results are numerically identical to ``model.predict``: inputs are cast to
+float32 exactly like sklearn does before comparing against the float64
+thresholds, and per-tree outputs are accumulated sequentially in estimator
+order before dividing by the number of trees.
+
+The node arrays are saved uncompressed with joblib, so ``FlatForest.load``
+can memory-map them read-only: every worker process on a host then shares
+one page-cache copy of the forest instead of unpickling its own.
+"""
+import joblib
+import numpy as np
+
+TREE_LEAF = -1
+
+
+class FlatForest:
+    """All trees of a fitted forest packed into shared node arrays"""
+
+    def __init__(self, feature, threshold, children_left, children_right, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def from_model(cls, model):
+        """Export a fitted ``RandomForestRegressor`` (single output) into flat arrays"""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        node_counts = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        roots = np.concatenate(([0], np.cumsum(node_counts)[:-1])).astype(np.int64)
+
+        def offset_children(children, root):
+            # Shift child indices into the global node space, leaves stay TREE_LEAF
+            return np.where(children == TREE_LEAF, TREE_LEAF, children + root)
+
+        return cls(
+            feature=np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int64),
+            threshold=np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+            children_left=np.concatenate(
+                [offset_children(tree.children_left, root) for tree, root in zip(trees, roots)]
+            ).astype(np.int64),
+            children_right=np.concatenate(
+                [offset_children(tree.children_right, root) for tree, root in zip(trees, roots)]
+            ).astype(np.int64),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+            roots=roots,
+            max_depth=max(tree.max_depth for tree in trees)
+        )
+
+    @property
+    def arrays(self):
+        """Node arrays by name, e.g. for persisting next to the model artifact"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children_left': self.children_left,
+            'children_right': self.children_right,
+            'value': self.value,
+            'roots': self.roots
+        }
+
+    def save(self, path):
+        """Persist the node arrays uncompressed so they can be memory-mapped"""
+        joblib.dump({**self.arrays, 'max_depth': self.max_depth}, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Load saved node arrays, memory-mapped read-only by default"""
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        return cls(
+            feature=data['feature'],
+            threshold=data['threshold'],
+            children_left=data['children_left'],
+            children_right=data['children_right'],
+            value=data['value'],
+            roots=data['roots'],
+            max_depth=data['max_depth']
+        )
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape ``(n_rows, n_estimators)``"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            internal = left != TREE_LEAF
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.children_right[nodes]), nodes)
+        return nodes
+
+    def predict(self, X):
+        """Predict like ``RandomForestRegressor.predict`` for a 1-D row or 2-D matrix"""
+        leaf_values = self.value[self.apply(X)]
+        # Sequential accumulation in estimator order matches sklearn bit for bit
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_estimators